@@ -0,0 +1,17 @@
+import os
+
+from celery import Celery
+from celery.signals import worker_process_init
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ats_optimizer.settings')
+
+app = Celery('ats_optimizer')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+
+@worker_process_init.connect
+def warm_up_gemini(**kwargs):
+    # Prefork children cannot reuse the parent's channel, so build their own at boot
+    from cv_optimizer.gemini_client import warm_up
+    warm_up()
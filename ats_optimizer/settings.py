@@ -57,6 +57,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than shared-cache memory, so tests from several threads see real SQLite locking
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -89,8 +91,124 @@ LOGOUT_REDIRECT_URL = '/'
 
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# CV text extraction
+CV_TEXT_CACHE_SIZE = config('CV_TEXT_CACHE_SIZE', default=128, cast=int)
+CV_PDF_MAX_PAGES = config('CV_PDF_MAX_PAGES', default=50, cast=int)
+CV_PDF_MAX_CHARS = config('CV_PDF_MAX_CHARS', default=200000, cast=int)
+CV_PDF_TIME_BUDGET = config('CV_PDF_TIME_BUDGET', default=10.0, cast=float)
+# PDFs with at least this many pages are extracted in a shared process pool
+CV_PDF_PARALLEL_THRESHOLD = config('CV_PDF_PARALLEL_THRESHOLD', default=20, cast=int)
+CV_PDF_PAGES_PER_TASK = config('CV_PDF_PAGES_PER_TASK', default=8, cast=int)
+CV_PDF_POOL_WORKERS = config('CV_PDF_POOL_WORKERS', default=None, cast=lambda v: int(v) if v else None)
+CV_BATCH_MAX_DOCUMENTS = config('CV_BATCH_MAX_DOCUMENTS', default=100, cast=int)
+
+# Cache - shared Redis when configured, otherwise a size-bounded per-process cache
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=1000, cast=int)},
+        }
+    }
+
+# Memoized analyze_cv/optimize_cv results
+CV_ANALYSIS_CACHE = 'default'
+CV_ANALYSIS_CACHE_TTL = config('CV_ANALYSIS_CACHE_TTL', default=24 * 60 * 60, cast=int)
+CV_ANALYSIS_LOCK_TIMEOUT = config('CV_ANALYSIS_LOCK_TIMEOUT', default=30, cast=int)
+
+# Celery - without a broker, tasks run eagerly inside the web process
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='memory://')
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=CELERY_BROKER_URL == 'memory://', cast=bool)
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_BEAT_SCHEDULE = {
+    'prewarm-application-guides': {
+        'task': 'cv_optimizer.tasks.prewarm_application_guides',
+        'schedule': 60 * 60,
+    },
+}
+
+# Bulk re-analysis (reanalyze_cvs): Gemini calls in flight, CVs per bulk_update, and prices for --dry-run estimates
+REANALYSIS_CONCURRENCY = config('REANALYSIS_CONCURRENCY', default=4, cast=int)
+REANALYSIS_BATCH_SIZE = config('REANALYSIS_BATCH_SIZE', default=50, cast=int)
+GEMINI_INPUT_PRICE_PER_MILLION = config('GEMINI_INPUT_PRICE_PER_MILLION', default=0.30, cast=float)
+GEMINI_OUTPUT_PRICE_PER_MILLION = config('GEMINI_OUTPUT_PRICE_PER_MILLION', default=2.50, cast=float)
+
+# Shared application guides: lifetime, retry delay for placeholders, and hourly pre-warming
+APPLICATION_GUIDE_TTL = config('APPLICATION_GUIDE_TTL', default=7 * 24 * 60 * 60, cast=int)
+APPLICATION_GUIDE_FALLBACK_TTL = config('APPLICATION_GUIDE_FALLBACK_TTL', default=10 * 60, cast=int)
+# Refresh up to this many of the most viewed guides expiring within the window
+APPLICATION_GUIDE_PREWARM_COUNT = config('APPLICATION_GUIDE_PREWARM_COUNT', default=50, cast=int)
+APPLICATION_GUIDE_PREWARM_WINDOW = config('APPLICATION_GUIDE_PREWARM_WINDOW', default=2 * 60 * 60, cast=int)
+
 # Gemini AI Configuration
 GEMINI_API_KEY = config('GEMINI_API_KEY', default='')
+GEMINI_MODEL = config('GEMINI_MODEL', default='gemini-2.5-flash')
+# Seconds to wait for a response, and calls allowed in flight per process
+GEMINI_TIMEOUT = config('GEMINI_TIMEOUT', default=30.0, cast=float)
+GEMINI_MAX_CONCURRENCY = config('GEMINI_MAX_CONCURRENCY', default=8, cast=int)
+# 'grpc' (default) or 'rest'
+GEMINI_TRANSPORT = config('GEMINI_TRANSPORT', default='')
+# Build the shared client at worker boot rather than on the first request
+GEMINI_WARMUP = config('GEMINI_WARMUP', default=True, cast=bool)
+# One call returns the analysis and the optimized CV; False restores the two-call path
+GEMINI_COMBINED_ANALYSIS = config('GEMINI_COMBINED_ANALYSIS', default=True, cast=bool)
+# 'gemini', or 'stub' to answer AI prompts locally for offline development and load tests
+LLM_BACKEND = config('LLM_BACKEND', default='gemini')
+# Stub behaviour: delays in seconds, error_rate and tail_rate as fractions of calls
+LLM_STUB = {
+    'latency': config('LLM_STUB_LATENCY', default=0.5, cast=float),
+    'jitter': config('LLM_STUB_JITTER', default=0.2, cast=float),
+    'tail_rate': config('LLM_STUB_TAIL_RATE', default=0.0, cast=float),
+    'tail_latency': config('LLM_STUB_TAIL_LATENCY', default=5.0, cast=float),
+    'error_rate': config('LLM_STUB_ERROR_RATE', default=0.0, cast=float),
+    'seed': config('LLM_STUB_SEED', default=0, cast=int),
+}
+# Requests per minute across all workers sharing GEMINI_GATEWAY_CACHE (0 disables the limit)
+GEMINI_RATE_LIMIT = config('GEMINI_RATE_LIMIT', default=60, cast=int)
+GEMINI_RATE_BURST = config('GEMINI_RATE_BURST', default=10, cast=int)
+# Longest wait for a rate-limit slot before a request is shed to its fallback answer; it is also
+# capped at the part of each prompt's deadline beyond the slow-call threshold below
+GEMINI_QUEUE_TIMEOUT = config('GEMINI_QUEUE_TIMEOUT', default=10.0, cast=float)
+# How long identical requests wait for the one already in flight
+GEMINI_FLIGHT_TIMEOUT = config('GEMINI_FLIGHT_TIMEOUT', default=60, cast=int)
+GEMINI_GATEWAY_CACHE = 'default'
+# Per-prompt deadlines in seconds; prompts not listed use GEMINI_TIMEOUT
+GEMINI_DEADLINES = {
+    'analyze_cv': 20,
+    'generate_optimized_cv': 40,
+    'analyze_and_optimize': 45,
+    'find_matching_jobs': 10,
+    'get_application_guide': 15,
+    'suggest_job_search': 10,
+}
+# Consecutive failed or slow calls (over this share of their deadline) that open the circuit breaker
+GEMINI_BREAKER_FAILURES = config('GEMINI_BREAKER_FAILURES', default=5, cast=int)
+GEMINI_SLOW_CALL_SHARE = config('GEMINI_SLOW_CALL_SHARE', default=0.75, cast=float)
+# Seconds an open breaker waits before letting a probe call through
+GEMINI_BREAKER_RESET_TIMEOUT = config('GEMINI_BREAKER_RESET_TIMEOUT', default=30, cast=int)
+# Input token budget per prompt; compacted CV text is trimmed, lowest-priority sections first, to fit
+GEMINI_PROMPT_BUDGETS = {
+    'analyze_cv': config('GEMINI_BUDGET_ANALYZE_CV', default=2500, cast=int),
+    'generate_optimized_cv': config('GEMINI_BUDGET_OPTIMIZE_CV', default=3000, cast=int),
+    'analyze_and_optimize': config('GEMINI_BUDGET_ANALYZE_AND_OPTIMIZE', default=2500, cast=int),
+    'find_matching_jobs': 600,
+    'get_application_guide': 100,
+    'suggest_job_search': 600,
+}
+
+# Stored LLM responses for repeated prompts
+LLM_CACHE_TTL = config('LLM_CACHE_TTL', default=7 * 24 * 60 * 60, cast=int)
+LLM_CACHE_MAX_ENTRIES = config('LLM_CACHE_MAX_ENTRIES', default=5000, cast=int)
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -5,6 +5,8 @@ from django.utils import timezone
 from datetime import timedelta
 from accounts.models import CustomUser
 from cv_optimizer.models import CVUpload
+from cv_optimizer.analysis_cache import get_stats as get_analysis_cache_stats
+from cv_optimizer.circuit_breaker import get_gemini_breaker
 from job_scraper.models import JobListing
 from core.models import ContactMessage
 from django.http import JsonResponse
@@ -44,6 +46,8 @@ def admin_dashboard(request):
         'latest_users': latest_users,
         'latest_cvs': latest_cvs,
         'latest_messages': latest_messages,
+        'analysis_cache': get_analysis_cache_stats(),
+        'gemini_breaker': get_gemini_breaker().get_state(),
     }
     
     return render(request, 'admin/index.html', context)
\ No newline at end of file
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import CVUpload, ATSKeyword, CVTemplate, CreatedCV
+from .models import CVUpload, ATSKeyword, KeywordSynonym, JobRole, LLMResponse, ApplicationGuide, CVTemplate, CreatedCV
+from .tasks import reanalyze_cvs, run_in_background
 
 @admin.register(CVUpload)
 class CVUploadAdmin(admin.ModelAdmin):
@@ -8,13 +9,62 @@ class CVUploadAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'user__email', 'job_role')
     readonly_fields = ('created_at', 'updated_at')
     ordering = ('-created_at',)
+    actions = ('reanalyze',)
+
+    @admin.action(description='Re-analyze selected CVs (skips ones already current)')
+    def reanalyze(self, request, queryset):
+        cv_ids = list(queryset.values_list('id', flat=True))
+        run_in_background(reanalyze_cvs, cv_ids)
+        self.message_user(request, f'Queued re-analysis of {len(cv_ids)} CVs.')
+
+class KeywordSynonymInline(admin.TabularInline):
+    model = KeywordSynonym
+    extra = 1
+
+class RoleSynonymInline(admin.TabularInline):
+    model = KeywordSynonym
+    fk_name = 'role'
+    extra = 1
+    autocomplete_fields = ('keyword',)
+    verbose_name_plural = 'Role-specific keyword synonyms'
+
+@admin.register(JobRole)
+class JobRoleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'aliases')
+    search_fields = ('name', 'aliases')
+    inlines = (RoleSynonymInline,)
 
 @admin.register(ATSKeyword)
 class ATSKeywordAdmin(admin.ModelAdmin):
     list_display = ('keyword', 'category', 'weight')
-    list_filter = ('category',)
+    list_filter = ('category', 'roles')
     search_fields = ('keyword', 'category')
     ordering = ('category', 'keyword')
+    filter_horizontal = ('roles',)
+    inlines = (KeywordSynonymInline,)
+
+@admin.register(KeywordSynonym)
+class KeywordSynonymAdmin(admin.ModelAdmin):
+    list_display = ('term', 'keyword', 'role')
+    list_filter = ('role',)
+    search_fields = ('term', 'keyword__keyword')
+    autocomplete_fields = ('keyword',)
+
+@admin.register(LLMResponse)
+class LLMResponseAdmin(admin.ModelAdmin):
+    list_display = ('prompt_name', 'prompt_version', 'model_name', 'hit_count', 'input_tokens', 'output_tokens',
+                    'trimmed_tokens', 'last_used_at', 'expires_at')
+    list_filter = ('prompt_name', 'model_name')
+    readonly_fields = ('cache_key', 'created_at', 'last_used_at')
+    ordering = ('-last_used_at',)
+
+@admin.register(ApplicationGuide)
+class ApplicationGuideAdmin(admin.ModelAdmin):
+    list_display = ('title', 'company', 'portal', 'view_count', 'refreshed_at', 'expires_at')
+    list_filter = ('portal',)
+    search_fields = ('title', 'company')
+    readonly_fields = ('view_count', 'created_at', 'refreshed_at')
+    ordering = ('-view_count',)
 
 @admin.register(CVTemplate)
 class CVTemplateAdmin(admin.ModelAdmin):
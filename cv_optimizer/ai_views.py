@@ -2,7 +2,7 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import DetailView, TemplateView, View
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.urls import reverse_lazy
 from .models import CVUpload
 from .gemini_service import GeminiCVAnalyzer
@@ -43,7 +43,9 @@ class AIOptimizedCVView(LoginRequiredMixin, DetailView):
             'missing_sections': missing_sections,
             'improvements': improvements,
             'keywords': keywords,
-            'match_percentage': match_percentage
+            'match_percentage': match_percentage,
+            # Nothing generated yet and no pipeline run will produce it: stream it in right away
+            'stream_on_load': not cv_upload.optimized_content and not cv_upload.is_processing
         })
         
         return context
@@ -69,6 +71,55 @@ class DownloadOptimizedAICVView(LoginRequiredMixin, DetailView):
         messages.error(request, 'Optimized CV content not available.')
         return redirect('cv_optimizer:ai_optimized', cv_id=cv_upload.id)
 
+class StreamOptimizedCVView(LoginRequiredMixin, View):
+    """Relay the optimized CV to the browser as Server-Sent Events while Gemini writes it"""
+    
+    def get(self, request, cv_id):
+        cv_upload = get_object_or_404(CVUpload, id=cv_id, user=request.user)
+        if cv_upload.is_processing:
+            return JsonResponse({'success': False, 'message': 'Analysis is still running.'}, status=409)
+        
+        force_refresh = request.GET.get('force_refresh') == '1'
+        response = StreamingHttpResponse(self.events(cv_upload, force_refresh), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream until it ends
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    def events(self, cv_upload, force_refresh):
+        from .utils import extract_text_from_file
+        
+        # Sent before extraction and the model call so the connection opens immediately
+        yield ': stream opened\n\n'
+        
+        cv_text = extract_text_from_file(cv_upload.original_cv.path)
+        parts = []
+        stream = GeminiCVAnalyzer().stream_optimized_cv(
+            cv_text, cv_upload.gemini_analysis or {}, force_refresh=force_refresh
+        )
+        while True:
+            try:
+                text = next(stream)
+            except StopIteration as finished:
+                complete = finished.value
+                break
+            parts.append(text)
+            yield self.event('chunk', {'text': text})
+        
+        if not complete:
+            # Gemini was unavailable or stopped mid-answer; the saved CV is kept as it was
+            yield self.event('error', {'message': 'Could not generate the optimized CV. Please try again.'})
+            return
+        
+        # Only reached when the whole answer was sent; a closed tab leaves the saved CV as it was
+        cv_upload.optimized_content = ''.join(parts)
+        cv_upload.save(update_fields=['optimized_content', 'updated_at'])
+        yield self.event('done', {'length': len(cv_upload.optimized_content)})
+    
+    @staticmethod
+    def event(name, data):
+        return f'event: {name}\ndata: {json.dumps(data)}\n\n'
+
 class JobMatchingView(LoginRequiredMixin, DetailView):
     model = CVUpload
     template_name = 'cv_optimizer/job_matching.html'
@@ -140,19 +191,19 @@ class RegenerateAnalysisView(LoginRequiredMixin, View):
             # Get job description from request if provided
             job_description = request.POST.get('job_description', cv_upload.job_role)
             
-            analysis = gemini_analyzer.analyze_cv(cv_text, job_description)
+            # Identical inputs reuse the stored response unless a fresh one is requested
+            force_refresh = request.POST.get('force_refresh') == '1'
             
-            # Update analysis results
-            cv_upload.gemini_analysis = analysis
-            cv_upload.ats_score = analysis.get('ats_score', 0)
-            cv_upload.missing_sections = analysis.get('missing_sections', [])
-            cv_upload.improvement_suggestions = analysis.get('improvements', [])
-            cv_upload.keyword_suggestions = analysis.get('keyword_suggestions', [])
-            cv_upload.job_match_percentage = analysis.get('job_match_percentage', 0)
+            # Analysis and optimized CV come back from a single call
+            analysis, optimized_content = gemini_analyzer.analyze_and_optimize(
+                cv_text, job_description, force_refresh=force_refresh
+            )
             
-            # Regenerate optimized content
-            optimized_content = gemini_analyzer.generate_optimized_cv(cv_text, analysis)
+            # Update analysis results
+            cv_upload.apply_gemini_analysis(analysis)
             cv_upload.optimized_content = optimized_content
+            cv_upload.status = CVUpload.STATUS_COMPLETED
+            cv_upload.status_message = ''
             
             cv_upload.save()
             
@@ -194,38 +245,7 @@ class CustomJobSearchView(LoginRequiredMixin, TemplateView):
                 cv_analysis = cv_upload.gemini_analysis or {}
             
             # Use Gemini to generate intelligent job search
-            search_prompt = f"""
-            Generate a smart job search for:
-            Job Title: {job_title}
-            Location: {location}
-            Skills: {skills}
-            Experience: {experience}
-            CV Analysis: {cv_analysis}
-            
-            Provide:
-            1. Optimized search keywords
-            2. Alternative job titles to search
-            3. Required skills to highlight
-            4. Salary expectations
-            5. Company recommendations
-            
-            Return as JSON format.
-            """
-            
-            ai_response = gemini_analyzer.model.generate_content(search_prompt).text
-            
-            # Parse AI response
-            import json
-            try:
-                search_data = json.loads(ai_response)
-            except:
-                search_data = {
-                    'keywords': [job_title],
-                    'alternative_titles': [job_title],
-                    'skills': skills.split(',') if skills else [],
-                    'salary_range': 'Competitive',
-                    'companies': ['Top Companies']
-                }
+            search_data = gemini_analyzer.suggest_job_search(job_title, location, skills, experience, cv_analysis)
             
             # Get real jobs using fallback method
             import requests
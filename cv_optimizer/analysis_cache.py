@@ -0,0 +1,89 @@
+"""
+Memoize expensive CV analysis results in the Django cache.
+
+Results are keyed by whatever determines them (content hash, role, keyword
+version), expire after CV_ANALYSIS_CACHE_TTL and are evicted by the cache
+backend's own size limit. Concurrent requests for the same key wait for the
+first one instead of repeating the work.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+KEY_PREFIX = 'cv_optimizer:memo'
+STATS_KEY = 'cv_optimizer:memo_stats:{}'
+STAT_NAMES = ('hits', 'misses', 'waits')
+
+
+def _cache():
+    return caches[getattr(settings, 'CV_ANALYSIS_CACHE', 'default')]
+
+
+def make_key(namespace, key_parts):
+    raw = '|'.join(str(part) for part in key_parts)
+    return f"{KEY_PREFIX}:{namespace}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+
+def _count(name):
+    cache = _cache()
+    key = STATS_KEY.format(name)
+    # incr is atomic on shared backends; add creates the counter on first use
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_stats():
+    """Return hit/miss counters shared by every process using the cache"""
+    values = _cache().get_many([STATS_KEY.format(name) for name in STAT_NAMES])
+    stats = {name: values.get(STATS_KEY.format(name), 0) for name in STAT_NAMES}
+    lookups = stats['hits'] + stats['misses'] + stats['waits']
+    stats['hit_rate'] = round((stats['hits'] + stats['waits']) * 100 / lookups, 1) if lookups else 0
+    return stats
+
+
+def reset_stats():
+    _cache().delete_many([STATS_KEY.format(name) for name in STAT_NAMES])
+
+
+def memoize(namespace, key_parts, compute, cacheable=None):
+    """Return compute() for the key, computing it at most once across concurrent callers
+
+    cacheable(result) can veto storing a result, e.g. one based on partial input.
+    """
+    cache = _cache()
+    key = make_key(namespace, key_parts)
+    result = cache.get(key)
+    if result is not None:
+        _count('hits')
+        return result
+
+    ttl = getattr(settings, 'CV_ANALYSIS_CACHE_TTL', 24 * 60 * 60)
+    lock_timeout = getattr(settings, 'CV_ANALYSIS_LOCK_TIMEOUT', 30)
+    lock_key = f'{key}:lock'
+    locked = cache.add(lock_key, 1, lock_timeout)
+    if not locked:
+        # Another request is computing this result; wait for it rather than repeating the work
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            result = cache.get(key)
+            if result is not None:
+                _count('waits')
+                return result
+            if cache.get(lock_key) is None:
+                break
+
+    _count('misses')
+    try:
+        result = compute()
+        if cacheable is None or cacheable(result):
+            cache.set(key, result, ttl)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return result
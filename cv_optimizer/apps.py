@@ -2,4 +2,9 @@ from django.apps import AppConfig
 
 class CvOptimizerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'cv_optimizer'
\ No newline at end of file
+    name = 'cv_optimizer'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .gemini_client import warm_up
+        warm_up()
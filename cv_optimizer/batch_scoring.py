@@ -0,0 +1,90 @@
+"""
+Score many CVs against many keyword sets at once.
+
+Every document is scanned a single time with one matcher built over the
+union of all keyword sets and their synonyms, giving a document x keyword
+presence matrix. Multiplying it by the keyword x set weight matrix, with each
+set crediting only its own synonyms, scores every pair in vectorized steps.
+"""
+import numpy as np
+
+from .keyword_matrix import build_scoring_matrices, match_weights
+from .keyword_taxonomy import get_keyword_set, get_role_keyword_sets
+from .text_normalization import normalize_document
+from .utils import extract_cv_document, is_extraction_error
+
+
+def score_matrix(documents, keyword_sets):
+    """Score every document against every keyword set
+
+    documents are raw CV texts or normalized documents. Returns a
+    len(documents) x len(keyword_sets) array of 0-100 scores, computed the same
+    way as calculate_ats_score.
+    """
+    if not documents or not keyword_sets:
+        return np.zeros((len(documents), len(keyword_sets)))
+
+    matrices = build_scoring_matrices(keyword_sets)
+    totals = matrices['totals']
+    matched = match_weights(documents, matrices)
+    scores = np.divide(matched * 100, totals, out=np.zeros_like(matched), where=totals > 0)
+    return np.round(np.minimum(scores, 100), 2)
+
+
+def load_documents(file_paths):
+    """Extract and normalize CV files, returning (documents, errors) keyed by position"""
+    documents = {}
+    errors = {}
+    for position, file_path in enumerate(file_paths):
+        document = extract_cv_document(file_path)
+        if is_extraction_error(document['text']):
+            errors[position] = document['text']
+        else:
+            documents[position] = normalize_document(document)
+    return documents, errors
+
+
+def score_cv_uploads(cv_uploads, job_roles=None):
+    """Score CV uploads against job titles, or against every known role when none are given
+
+    Returns {'roles': [...], 'results': [...], 'rankings': {...}} where each result
+    lists one CV's score per role, best first, and each ranking orders the CVs for
+    one role.
+    """
+    if job_roles:
+        keyword_sets = [get_keyword_set(job_role) for job_role in job_roles]
+        labels = list(job_roles)
+    else:
+        keyword_sets = get_role_keyword_sets()
+        labels = [keyword_set['role'] for keyword_set in keyword_sets]
+
+    cv_uploads = list(cv_uploads)
+    documents, errors = load_documents([cv_upload.original_cv.path for cv_upload in cv_uploads])
+    positions = sorted(documents)
+    scores = score_matrix([documents[position] for position in positions], keyword_sets)
+
+    results = []
+    for row, position in enumerate(positions):
+        cv_upload = cv_uploads[position]
+        order = np.argsort(-scores[row], kind='stable')
+        results.append({
+            'cv_id': cv_upload.id,
+            'file_name': cv_upload.original_cv.name,
+            'scores': [{'role': labels[column], 'score': float(scores[row, column])} for column in order],
+        })
+    for position, error in errors.items():
+        results.append({'cv_id': cv_uploads[position].id, 'file_name': cv_uploads[position].original_cv.name,
+                        'error': error})
+
+    rankings = {}
+    for column, label in enumerate(labels):
+        order = np.argsort(-scores[:, column], kind='stable')
+        rankings[label] = [{'cv_id': cv_uploads[positions[row]].id, 'score': float(scores[row, column])}
+                           for row in order]
+
+    return {
+        'roles': [{'role': label, 'resolved_role': keyword_set['role']}
+                  for label, keyword_set in zip(labels, keyword_sets)],
+        'results': results,
+        'rankings': rankings,
+    }
@@ -0,0 +1,183 @@
+"""
+Re-analysis of many CVs at once, e.g. after a prompt or keyword change.
+
+Each CVUpload records in gemini_analysis_key the model, prompt versions and
+keyword set its analysis was built from, so CVs that are already current are
+skipped and an interrupted run resumes where it stopped. Text extraction runs
+in a process pool, Gemini calls in a bounded thread pool (still subject to
+the gateway's rate limit and circuit breaker), and each batch of results is
+written back with a single bulk_update.
+"""
+import hashlib
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.db.models import Avg
+from django.utils import timezone
+
+from .gemini_service import GeminiCVAnalyzer
+from .llm_cache import has_response, make_key
+from .models import CVUpload, LLMResponse
+from .prompt_builder import estimate_tokens, strip_indentation
+from .utils import ensure_ats_analysis, extract_cv_document, get_analysis_key, is_extraction_error
+
+logger = logging.getLogger(__name__)
+
+UPDATE_FIELDS = [
+    'content_hash', 'ats_analysis', 'analysis_key', 'ats_score', 'gemini_analysis', 'missing_sections',
+    'improvement_suggestions', 'keyword_suggestions', 'job_match_percentage', 'optimized_content',
+    'gemini_analysis_key', 'status', 'status_message', 'updated_at',
+]
+
+# Output tokens for the analysis JSON around the rewritten CV, used until real usage has been recorded
+ANALYSIS_OUTPUT_TOKENS = 300
+
+
+def get_reanalysis_key(analysis_version, ats_analysis_key):
+    """Fingerprint stored in CVUpload.gemini_analysis_key"""
+    raw = f'{analysis_version}|{ats_analysis_key}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def select_outdated(queryset, force=False):
+    """Return (ids to re-analyze, number already current), oldest first
+
+    CVs still in the upload pipeline are left to it. With force every other
+    CV is selected, current or not.
+    """
+    analysis_version = GeminiCVAnalyzer().get_analysis_version()
+    rows = queryset.filter(status__in=[CVUpload.STATUS_COMPLETED, CVUpload.STATUS_FAILED]).order_by('id')
+    selected, current = [], 0
+    for cv_id, file_name, job_role, stored_key in rows.values_list('id', 'original_cv', 'job_role', 'gemini_analysis_key'):
+        if not force and stored_key == get_reanalysis_key(analysis_version, get_analysis_key(file_name, job_role)):
+            current += 1
+        else:
+            selected.append(cv_id)
+    return selected, current
+
+
+def _extract(file_path):
+    """Extraction worker: return the CV text, or the extraction error message"""
+    try:
+        return extract_cv_document(file_path)['text']
+    except Exception as e:
+        return f'Error extracting text: {e}'
+
+
+def _extractor(processes):
+    # processes=0 extracts in a thread instead, e.g. inside a Celery worker, which may not fork
+    if processes == 0:
+        return ThreadPoolExecutor(max_workers=1)
+    # Forked workers must not inherit our open database connections
+    connections.close_all()
+    return ProcessPoolExecutor(max_workers=processes, initializer=django.setup)
+
+
+def _reanalyze(cv_upload, cv_text, analysis_version, force_refresh):
+    """Thread worker: rescore and re-analyze one CV in memory, returning whether Gemini answered"""
+    if is_extraction_error(cv_text):
+        logger.warning('Skipping re-analysis of CVUpload %s: %s', cv_upload.pk, cv_text)
+        return False
+    try:
+        ensure_ats_analysis(cv_upload, save=False)
+        analyzer = GeminiCVAnalyzer()
+        analysis, optimized_content = analyzer.analyze_and_optimize(
+            cv_text, cv_upload.job_role, force_refresh=force_refresh
+        )
+        if analyzer.is_fallback_analysis(analysis):
+            # Keep the stored analysis; the CV stays outdated, so the next run retries it
+            return False
+        cv_upload.apply_gemini_analysis(analysis)
+        cv_upload.optimized_content = optimized_content
+        cv_upload.gemini_analysis_key = get_reanalysis_key(analysis_version, cv_upload.analysis_key)
+        cv_upload.status = CVUpload.STATUS_COMPLETED
+        cv_upload.status_message = ''
+        cv_upload.updated_at = timezone.now()
+        return True
+    except Exception:
+        logger.exception('Re-analysis failed for CVUpload %s', cv_upload.pk)
+        return False
+    finally:
+        connections.close_all()
+
+
+def reanalyze(cv_ids, concurrency=None, processes=None, batch_size=None, force_refresh=False, progress=None):
+    """Re-analyze cv_ids batch by batch, returning (updated, failed)
+
+    The next batch is extracted while the current one waits on Gemini.
+    progress(done, total, updated, failed, elapsed) is called after each batch
+    is written.
+    """
+    concurrency = concurrency or getattr(settings, 'REANALYSIS_CONCURRENCY', 4)
+    batch_size = batch_size or getattr(settings, 'REANALYSIS_BATCH_SIZE', 50)
+    analysis_version = GeminiCVAnalyzer().get_analysis_version()
+    batches = [cv_ids[start:start + batch_size] for start in range(0, len(cv_ids), batch_size)]
+    updated = failed = 0
+    started = time.monotonic()
+
+    with _extractor(processes) as extractor, ThreadPoolExecutor(max_workers=concurrency) as callers:
+        def submit(batch):
+            cv_uploads = list(CVUpload.objects.filter(pk__in=batch).order_by('id'))
+            return cv_uploads, [extractor.submit(_extract, cv_upload.original_cv.path) for cv_upload in cv_uploads]
+
+        pending = submit(batches[0]) if batches else None
+        for index in range(len(batches)):
+            cv_uploads, extractions = pending
+            pending = submit(batches[index + 1]) if index + 1 < len(batches) else None
+
+            texts = [extraction.result() for extraction in extractions]
+            results = list(callers.map(
+                lambda args: _reanalyze(*args, analysis_version, force_refresh), zip(cv_uploads, texts)
+            ))
+            done = [cv_upload for cv_upload, ok in zip(cv_uploads, results) if ok]
+            CVUpload.objects.bulk_update(done, UPDATE_FIELDS)
+
+            updated += len(done)
+            # CVs deleted since selection count as failed
+            failed += len(batches[index]) - len(done)
+            if progress:
+                progress(updated + failed, len(cv_ids), updated, failed, time.monotonic() - started)
+    return updated, failed
+
+
+def estimate_cost(cv_ids, force_refresh=False, processes=None):
+    """Estimate the Gemini calls, tokens and cost of re-analyzing cv_ids, without calling Gemini
+
+    Responses already in the LLM cache are free unless force_refresh is set.
+    Assumes the combined analyze_and_optimize call is used.
+    """
+    analyzer = GeminiCVAnalyzer()
+    average_output = LLMResponse.objects.filter(
+        prompt_name='analyze_and_optimize', output_tokens__gt=0
+    ).aggregate(average=Avg('output_tokens'))['average']
+    cv_uploads = list(CVUpload.objects.filter(pk__in=cv_ids).only('id', 'original_cv', 'job_role'))
+
+    estimate = {'cvs': len(cv_uploads), 'calls': 0, 'cached': 0, 'unreadable': 0, 'input_tokens': 0, 'output_tokens': 0}
+    with _extractor(processes) as extractor:
+        texts = list(extractor.map(_extract, [cv_upload.original_cv.path for cv_upload in cv_uploads]))
+
+    for cv_upload, cv_text in zip(cv_uploads, texts):
+        if is_extraction_error(cv_text):
+            estimate['unreadable'] += 1
+            continue
+        cache_key = make_key(analyzer.model_name, 'analyze_and_optimize', [cv_text, cv_upload.job_role])
+        if not force_refresh and has_response(cache_key):
+            estimate['cached'] += 1
+            continue
+        prompt, _ = analyzer.build_analysis_prompt(cv_text, cv_upload.job_role)
+        estimate['calls'] += 1
+        estimate['input_tokens'] += estimate_tokens(strip_indentation(prompt))
+        estimate['output_tokens'] += int(average_output or estimate_tokens(cv_text) + ANALYSIS_OUTPUT_TOKENS)
+
+    estimate['cost'] = (
+        estimate['input_tokens'] * getattr(settings, 'GEMINI_INPUT_PRICE_PER_MILLION', 0.30)
+        + estimate['output_tokens'] * getattr(settings, 'GEMINI_OUTPUT_PRICE_PER_MILLION', 2.50)
+    ) / 1_000_000
+    rate_limit = getattr(settings, 'GEMINI_RATE_LIMIT', 60)
+    # The rate limit sets a floor on the run time, however high the concurrency
+    estimate['minimum_minutes'] = estimate['calls'] / rate_limit if rate_limit else 0
+    return estimate
@@ -0,0 +1,126 @@
+"""
+Circuit breaker for the Gemini API.
+
+After GEMINI_BREAKER_FAILURES consecutive failed or slow calls (those using
+more than GEMINI_SLOW_CALL_SHARE of their deadline) the breaker opens, and
+callers skip the network entirely and get their fallback answer at once.
+After GEMINI_BREAKER_RESET_TIMEOUT seconds it turns half-open and lets a
+single probe call through: success closes it again, failure reopens it.
+State lives in the shared cache so every worker sees the same breaker.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = 'cv_optimizer:breaker:{}'
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.key = STATE_KEY.format(name)
+
+    def _cache(self):
+        return caches[getattr(settings, 'GEMINI_GATEWAY_CACHE', 'default')]
+
+    def get_state(self):
+        """Return the shared breaker state, turning an expired open breaker half-open"""
+        state = self._cache().get(self.key) or {
+            'state': CLOSED, 'failures': 0, 'trips': 0, 'opened_at': None, 'last_error': '',
+        }
+        if state['state'] == OPEN and time.time() - state['opened_at'] >= self.reset_timeout:
+            state['state'] = HALF_OPEN
+        return state
+
+    def _save(self, state):
+        self._cache().set(self.key, state, None)
+
+    def allow(self):
+        """Whether a call may go out now; in the half-open state only one probe is let through"""
+        state = self.get_state()
+        if state['state'] == CLOSED:
+            return True
+        if state['state'] == HALF_OPEN:
+            return self._cache().add(f'{self.key}:probe', 1, self.reset_timeout)
+        return False
+
+    def record_success(self, duration, slow_after=None):
+        if slow_after and duration >= slow_after:
+            self.record_failure(f'slow call ({duration:.1f}s)')
+            return
+        state = self.get_state()
+        if state['state'] != CLOSED:
+            logger.info('Circuit %s closed after a successful probe', self.name)
+        state.update(state=CLOSED, failures=0, opened_at=None)
+        self._save(state)
+        self.release_probe()
+
+    def record_failure(self, error):
+        state = self.get_state()
+        state['failures'] += 1
+        state['last_error'] = str(error)[:200]
+        # A failed probe reopens the breaker straight away
+        if state['state'] == HALF_OPEN or state['failures'] >= self.failure_threshold:
+            if state['state'] != OPEN:
+                state['trips'] += 1
+                logger.warning('Circuit %s opened after %d failures: %s', self.name, state['failures'], error)
+            state.update(state=OPEN, opened_at=time.time())
+        self._save(state)
+        self.release_probe()
+
+    def release_probe(self):
+        """Let another caller probe a half-open breaker, e.g. when ours never reached the API"""
+        self._cache().delete(f'{self.key}:probe')
+
+    def call(self, func, slow_after=None, ignore=(), before=None):
+        """Run func() through the breaker, raising CircuitOpen instead when it is open
+
+        A call taking slow_after seconds or more counts as a failure. Exceptions
+        listed in ignore (e.g. our own load shedding) pass through without
+        counting as failures. before(), e.g. the wait for a rate-limit slot,
+        runs once the call is allowed but is neither timed nor counted.
+        """
+        if not self.allow():
+            raise CircuitOpen(f'{self.name} circuit is open')
+        if before is not None:
+            try:
+                before()
+            except Exception:
+                self.release_probe()
+                raise
+        started = time.monotonic()
+        try:
+            result = func()
+        except ignore:
+            self.release_probe()
+            raise
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success(time.monotonic() - started, slow_after)
+        return result
+
+    def reset(self):
+        self._cache().delete_many([self.key, f'{self.key}:probe'])
+
+
+def get_gemini_breaker():
+    return CircuitBreaker(
+        'gemini',
+        failure_threshold=getattr(settings, 'GEMINI_BREAKER_FAILURES', 5),
+        reset_timeout=getattr(settings, 'GEMINI_BREAKER_RESET_TIMEOUT', 30),
+    )
@@ -0,0 +1,118 @@
+import re
+
+SECTION_NAMES = ['contact', 'summary', 'experience', 'education', 'skills', 'projects', 'certifications']
+
+# Heading words and the section they introduce; the first known word in a heading wins
+HEADING_WORDS = {
+    'contact': 'contact',
+    'summary': 'summary', 'profile': 'summary', 'objective': 'summary', 'about': 'summary',
+    'experience': 'experience', 'employment': 'experience', 'work': 'experience',
+    'internship': 'experience', 'internships': 'experience',
+    'education': 'education', 'academic': 'education', 'academics': 'education',
+    'qualification': 'education', 'qualifications': 'education',
+    'skills': 'skills', 'skill': 'skills', 'competencies': 'skills', 'technologies': 'skills', 'expertise': 'skills',
+    'projects': 'projects', 'project': 'projects', 'portfolio': 'projects',
+    'certifications': 'certifications', 'certification': 'certifications', 'certificates': 'certifications',
+    'certificate': 'certifications', 'courses': 'certifications', 'training': 'certifications',
+    'licenses': 'certifications',
+}
+
+MAX_HEADING_LENGTH = 50
+MAX_HEADING_WORDS = 5
+HEADING_STRIP_CHARS = ' \t\r\n•*-–—:|#=_.>➢▪●■'
+CONTENT_LINE_PREFIXES = '•*-–—>➢▪●■|,&/'
+MINOR_WORDS = {'and', 'of', 'the', '&', 'in', 'for'}
+WORD_PATTERN = re.compile(r'[a-z]+')
+
+# Bounded, anchored patterns keep matching linear even on long runs of symbols
+EMAIL_PATTERN = re.compile(r'[\w.+-]{1,64}@[\w-]{1,63}(?:\.[\w-]{1,63}){1,8}')
+PHONE_PATTERN = re.compile(r'(?<!\d)\+?\d{7,15}(?!\d)')
+
+
+def _heading_section(line):
+    """Return (section, is_known) if the line looks like a section heading, else None"""
+    if len(line) > MAX_HEADING_LENGTH * 2:
+        return None
+
+    # Bullets and wrapped continuations ("| MICROSOFT OFFICE") are content, not headings
+    raw = line.lstrip()
+    if not raw or raw[0] in CONTENT_LINE_PREFIXES:
+        return None
+
+    stripped = line.strip(HEADING_STRIP_CHARS)
+    # "Skills: Python, Django" carries its heading inline
+    inline = ':' in stripped
+    if inline:
+        stripped = stripped.split(':', 1)[0].strip(HEADING_STRIP_CHARS)
+
+    if not stripped or len(stripped) > MAX_HEADING_LENGTH:
+        return None
+    words = WORD_PATTERN.findall(stripped.lower())
+    if not words or len(words) > MAX_HEADING_WORDS:
+        return None
+
+    # Headings are set apart by capitals or a colon, unlike a sentence that wraps onto a short line
+    is_upper = stripped.isupper()
+    if not (is_upper or inline or line.rstrip().endswith(':') or _is_title_case(stripped)):
+        return None
+
+    for word in words:
+        section = HEADING_WORDS.get(word)
+        if section:
+            return section, True
+
+    # Unknown all-caps headings ("HOBBIES") still end the previous section
+    if is_upper and not inline:
+        return 'other', False
+    return None
+
+
+def _is_title_case(text):
+    return all(word[0].isupper() for word in text.split() if word[0].isalpha() and word.lower() not in MINOR_WORDS)
+
+
+def segment_cv(cv_text):
+    """Split a CV into headed sections in one pass over its lines
+
+    Returns a list of {'name', 'heading', 'start', 'end'} dicts with character
+    offsets into cv_text. Text before the first recognised heading is the
+    contact section.
+    """
+    sections = []
+    current = {'name': 'contact', 'heading': '', 'start': 0}
+    seen_known_heading = False
+    offset = 0
+
+    for line in cv_text.splitlines(keepends=True):
+        heading = _heading_section(line)
+        if heading:
+            name, is_known = heading
+            # Unknown headings only split sections once the CV body has started
+            if (is_known or seen_known_heading) and name != current['name']:
+                if offset > current['start'] or current['heading']:
+                    current['end'] = offset
+                    sections.append(current)
+                current = {'name': name, 'heading': line.strip(), 'start': offset}
+            seen_known_heading = seen_known_heading or is_known
+        offset += len(line)
+
+    current['end'] = offset
+    if current['end'] > current['start'] or current['heading']:
+        sections.append(current)
+    return sections
+
+
+def find_email(cv_text):
+    """Return the first email address in the text, checking only tokens containing '@'"""
+    for token in cv_text.split():
+        if '@' in token:
+            match = EMAIL_PATTERN.search(token)
+            if match:
+                return match.group()
+    return None
+
+
+def find_phone(cv_text):
+    """Return the first phone-number-like run of 7-15 digits in the text"""
+    match = PHONE_PATTERN.search(cv_text)
+    return match.group() if match else None
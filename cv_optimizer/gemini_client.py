@@ -0,0 +1,108 @@
+"""
+Process-wide Gemini client shared by every request thread.
+
+genai.configure() replaces the library's default client (and its channel),
+so it must run once per process rather than once per request. The client is
+created lazily, rebuilt after a fork, and every call runs on a small thread
+pool so a deadline can be enforced: the SDK version in use takes no per-call
+timeout.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+import google.generativeai as genai
+from django.conf import settings
+from google.generativeai import client as genai_client
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+class GeminiTimeout(Exception):
+    pass
+
+
+class GeminiClient:
+    def __init__(self, api_key, model_name, timeout, max_concurrency, transport=None):
+        genai.configure(api_key=api_key, transport=transport or None)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='gemini')
+        # Create the transport now so the first request does not pay for it; later calls reuse it
+        genai_client.get_default_generative_client()
+
+    def generate(self, prompt, timeout=None, **kwargs):
+        """Call generate_content, raising GeminiTimeout if it takes longer than the deadline
+
+        Callers take a rate-limit slot first; see llm_gateway.acquire().
+        """
+        timeout = timeout or self.timeout
+        future = self._executor.submit(self.model.generate_content, prompt, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            future.cancel()
+            raise GeminiTimeout(f'Gemini did not answer within {timeout:g}s')
+
+    def stream(self, prompt, timeout=None, **kwargs):
+        """Yield response chunks as Gemini produces them
+
+        The deadline applies to the wait for each chunk, so long answers are
+        not cut off as long as they keep arriving.
+        """
+        timeout = timeout or self.timeout
+        chunks = iter(self.generate(prompt, timeout=timeout, stream=True, **kwargs))
+        while True:
+            future = self._executor.submit(next, chunks, None)
+            try:
+                chunk = future.result(timeout=timeout)
+            except FuturesTimeoutError:
+                future.cancel()
+                raise GeminiTimeout(f'Gemini stopped streaming for {timeout:g}s')
+            if chunk is None:
+                return
+            yield chunk
+
+
+def get_gemini_client():
+    """Return the shared client, or None when Gemini is not configured"""
+    global _client, _client_pid
+    if _client_pid == os.getpid():
+        return _client
+
+    with _lock:
+        # A client inherited through fork shares a channel with the parent and must be rebuilt
+        if _client_pid != os.getpid():
+            _client = _create_client()
+            _client_pid = os.getpid()
+        return _client
+
+
+def _create_client():
+    api_key = getattr(settings, 'GEMINI_API_KEY', '')
+    if not api_key:
+        return None
+    try:
+        return GeminiClient(
+            api_key=api_key,
+            model_name=getattr(settings, 'GEMINI_MODEL', 'gemini-2.5-flash'),
+            timeout=getattr(settings, 'GEMINI_TIMEOUT', 30.0),
+            max_concurrency=getattr(settings, 'GEMINI_MAX_CONCURRENCY', 8),
+            transport=getattr(settings, 'GEMINI_TRANSPORT', ''),
+        )
+    except Exception:
+        logger.exception('Gemini client initialization failed')
+        return None
+
+
+def warm_up(**kwargs):
+    """Build the client at worker boot instead of on the first request"""
+    if getattr(settings, 'GEMINI_WARMUP', True):
+        get_gemini_client()
@@ -1,28 +1,125 @@
-import google.generativeai as genai
 from django.conf import settings
 import json
+import logging
 import re
+import time
+from .circuit_breaker import get_gemini_breaker
+from .llm_backends import get_llm_backend
+from .llm_gateway import GeminiOverloaded, acquire
+from .llm_cache import PROMPT_VERSIONS, cached_call, get_response, make_key, store_response
+from .prompt_builder import ANALYSIS_KEYS, PromptBuilder, estimate_tokens, strip_indentation
+
+logger = logging.getLogger(__name__)
+
+FENCED_BLOCK_PATTERN = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL | re.IGNORECASE)
+
+def get_deadline(prompt_name):
+    """Seconds a prompt may take before it is abandoned for its fallback answer"""
+    deadlines = getattr(settings, 'GEMINI_DEADLINES', {})
+    return deadlines.get(prompt_name, getattr(settings, 'GEMINI_TIMEOUT', 30.0))
+
+def get_slow_after(deadline):
+    """Calls slower than this count against the circuit breaker even when they succeed"""
+    return deadline * getattr(settings, 'GEMINI_SLOW_CALL_SHARE', 0.75)
+
+def get_queue_budget(deadline):
+    """Longest wait for a rate-limit slot within a deadline
+    
+    Only the part of the deadline beyond the slow-call threshold may be spent
+    queueing, so the API call itself always gets at least that long.
+    """
+    return min(getattr(settings, 'GEMINI_QUEUE_TIMEOUT', 10), deadline - get_slow_after(deadline))
+
+def parse_json_response(text):
+    """Parse the JSON object in a model reply, tolerating code fences and surrounding prose
+
+    Raises ValueError for anything but an object, e.g. a bare list, so such a
+    reply is never stored in the LLM cache.
+    """
+    text = text.strip()
+    candidates = [text]
+    match = FENCED_BLOCK_PATTERN.search(text)
+    if match:
+        candidates.append(match.group(1))
+    for candidate in candidates:
+        try:
+            result = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(result, dict):
+            return result
+    
+    # First complete object in the reply, ignoring anything after it
+    start = text.find('{')
+    if start == -1:
+        raise ValueError('No JSON object in model response')
+    return json.JSONDecoder().raw_decode(text[start:])[0]
 
 class GeminiCVAnalyzer:
     def __init__(self):
-        try:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
-            self.enabled = True
-        except Exception as e:
-            self.enabled = False
-            print(f"Gemini API initialization failed: {e}")
+        # Cheap to construct: the backend (Gemini or the local stub) is shared process-wide
+        self.client = get_llm_backend()
+        self.enabled = self.client is not None
+        self.model = self.client.model if self.enabled else None
+        self.model_name = self.client.model_name if self.enabled else getattr(settings, 'GEMINI_MODEL', 'gemini-2.5-flash')
+        self.breaker = get_gemini_breaker()
+        self.last_usage = {}
+    
+    def generate(self, prompt, builder=None):
+        """Return the response text for a prompt within its deadline
+        
+        Raises CircuitOpen without calling the API while the breaker is open.
+        The wait for a rate-limit slot comes out of the deadline but is not
+        timed by the breaker. Token estimates for the call are kept in last_usage.
+        """
+        started = time.perf_counter()
+        prompt = strip_indentation(prompt)
+        deadline = get_deadline(builder.prompt_name if builder else None)
+        queue = {'waited': 0}
+        
+        def wait_for_slot():
+            queue['waited'] = acquire(max_wait=get_queue_budget(deadline))
+        
+        response = self.breaker.call(
+            lambda: self.client.generate(prompt, timeout=deadline - queue['waited']),
+            slow_after=get_slow_after(deadline),
+            ignore=(GeminiOverloaded,),
+            before=wait_for_slot
+        )
+        text = response.text
+        output_tokens = sum(getattr(candidate, 'token_count', 0) for candidate in response.candidates)
+        self.last_usage = self._usage(prompt, text, builder, output_tokens)
+        logger.info(
+            'Gemini %s took %.2fs (%.2fs queued): ~%d input tokens (%d trimmed), %d output tokens',
+            builder.prompt_name if builder else 'prompt', time.perf_counter() - started, queue['waited'],
+            self.last_usage['input_tokens'], self.last_usage['trimmed_tokens'], self.last_usage['output_tokens']
+        )
+        return text
     
-    def analyze_cv(self, cv_text, job_description=""):
+    @staticmethod
+    def _usage(prompt, text, builder=None, output_tokens=0):
+        return {
+            'input_tokens': estimate_tokens(prompt),
+            'output_tokens': output_tokens or estimate_tokens(text),
+            'trimmed_tokens': builder.saved_tokens if builder else 0,
+        }
+    
+    def _cached(self, prompt_name, inputs, generate, force_refresh=False):
+        """Reuse a stored response for identical inputs unless force_refresh is set"""
+        return cached_call(self.model_name, prompt_name, inputs, generate, force_refresh, lambda: self.last_usage)
+    
+    def analyze_cv(self, cv_text, job_description="", force_refresh=False):
         if not self.enabled:
             return self._get_fallback_analysis()
             
         try:
+            builder = PromptBuilder('analyze_cv')
+            job_description_text = builder.text(job_description)
             prompt = f"""
             Analyze this CV and provide detailed feedback:
             
-            CV Content: {cv_text}
-            Job Description: {job_description}
+            CV Content: {builder.cv(cv_text)}
+            Job Description: {job_description_text}
             
             Provide response in JSON format:
             {{
@@ -39,22 +136,99 @@ class GeminiCVAnalyzer:
             }}
             """
             
-            response = self.model.generate_content(prompt)
-            return json.loads(response.text)
+            return self._cached(
+                'analyze_cv', [cv_text, job_description],
+                lambda: parse_json_response(self.generate(prompt, builder)), force_refresh
+            )
         except Exception as e:
             print(f"Gemini analysis failed: {e}")
             return self._get_fallback_analysis()
     
-    def generate_optimized_cv(self, cv_text, analysis_data):
+    def generate_optimized_cv(self, cv_text, analysis_data, force_refresh=False):
         if not self.enabled:
             return self._get_fallback_optimized_cv(cv_text)
             
         try:
-            prompt = f"""
+            builder = PromptBuilder('generate_optimized_cv')
+            prompt = self._optimized_cv_prompt(builder, cv_text, analysis_data)
+            return self._cached(
+                'generate_optimized_cv', [cv_text, analysis_data],
+                lambda: self.generate(prompt, builder), force_refresh
+            )
+        except Exception as e:
+            print(f"Gemini optimization failed: {e}")
+            return self._get_fallback_optimized_cv(cv_text)
+    
+    def stream_optimized_cv(self, cv_text, analysis_data, force_refresh=False):
+        """Yield the optimized CV text in chunks as Gemini writes it
+        
+        Shares its cache entry with generate_optimized_cv: a stored answer is
+        yielded in one piece, and a completed stream is stored for next time.
+        Returns True once the whole answer was yielded, and False when Gemini
+        is unavailable or the stream broke off, having yielded nothing or only
+        part of the answer. No placeholder text is yielded.
+        """
+        if not self.enabled:
+            return False
+        
+        cache_key = make_key(self.model_name, 'generate_optimized_cv', [cv_text, analysis_data])
+        if not force_refresh:
+            cached = get_response(cache_key)
+            if cached is not None:
+                yield cached
+                return True
+        
+        if not self.breaker.allow():
+            return False
+        
+        started = time.perf_counter()
+        first_chunk_after = None
+        parts = []
+        builder = PromptBuilder('generate_optimized_cv')
+        prompt = strip_indentation(self._optimized_cv_prompt(builder, cv_text, analysis_data))
+        # The deadline applies to each chunk, and only the wait for the first one can be slow
+        deadline = get_deadline('generate_optimized_cv')
+        try:
+            waited = acquire(max_wait=get_queue_budget(deadline))
+            # The breaker times the API alone, not the wait for a rate-limit slot
+            requested = time.perf_counter()
+            for chunk in self.client.stream(prompt, timeout=deadline - waited):
+                if first_chunk_after is None:
+                    first_chunk_after = time.perf_counter() - requested
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield chunk.text
+        except Exception as e:
+            if isinstance(e, GeminiOverloaded):
+                self.breaker.release_probe()
+            else:
+                self.breaker.record_failure(e)
+            logger.exception('Gemini optimization stream failed after %d chunks', len(parts))
+            # A partial answer is not worth keeping
+            return False
+        
+        self.breaker.record_success(first_chunk_after or 0, get_slow_after(deadline))
+        text = ''.join(parts)
+        if not text:
+            return False
+        usage = self._usage(prompt, text, builder)
+        logger.info(
+            'Gemini generate_optimized_cv streamed in %.2fs: ~%d input tokens (%d trimmed), ~%d output tokens',
+            time.perf_counter() - started, usage['input_tokens'], usage['trimmed_tokens'], usage['output_tokens']
+        )
+        try:
+            store_response(cache_key, self.model_name, 'generate_optimized_cv', text, usage)
+        except Exception:
+            logger.exception('Could not store streamed response in the LLM cache')
+        return True
+    
+    def _optimized_cv_prompt(self, builder, cv_text, analysis_data):
+        analysis_text = builder.data(analysis_data, keys=ANALYSIS_KEYS)
+        return f"""
             Create an ATS-optimized CV based on this analysis:
             
-            Original CV: {cv_text}
-            Analysis: {analysis_data}
+            Original CV: {builder.cv(cv_text)}
+            Analysis: {analysis_text}
             
             Generate a complete, professional CV with:
             - ATS-friendly formatting
@@ -66,12 +240,75 @@ class GeminiCVAnalyzer:
             
             Return only the CV content in plain text format.
             """
-            
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            print(f"Gemini optimization failed: {e}")
-            return self._get_fallback_optimized_cv(cv_text)
+    
+    def build_analysis_prompt(self, cv_text, job_description=""):
+        """Return (prompt, builder) for the combined analyze_and_optimize call"""
+        builder = PromptBuilder('analyze_and_optimize')
+        job_description_text = builder.text(job_description)
+        prompt = f"""
+        Analyze this CV for the job below, then rewrite it as an ATS-optimized CV.
+        
+        CV Content: {builder.cv(cv_text)}
+        Job Description: {job_description_text}
+        
+        The optimized CV must use ATS-friendly formatting, relevant keywords, quantified
+        achievements, a professional summary, a skills section and experience with impact
+        metrics, as plain text.
+        
+        Respond with a single JSON object and nothing else:
+        {{
+            "ats_score": 85,
+            "missing_sections": ["Skills", "Certifications"],
+            "improvements": ["Add quantified achievements", "Include relevant keywords"],
+            "keyword_suggestions": ["Python", "Machine Learning", "AWS"],
+            "optimized_sections": {{
+                "summary": "Optimized professional summary",
+                "experience": "Enhanced experience section",
+                "skills": "Recommended skills section"
+            }},
+            "job_match_percentage": 75,
+            "optimized_cv": "The complete optimized CV as plain text"
+        }}
+        """
+        return prompt, builder
+    
+    def get_analysis_version(self):
+        """Fingerprint of the model and prompt versions a stored CV analysis comes from"""
+        if self.enabled and getattr(settings, 'GEMINI_COMBINED_ANALYSIS', True):
+            prompts = ['analyze_and_optimize']
+        else:
+            prompts = ['analyze_cv', 'generate_optimized_cv']
+        return ':'.join([self.model_name] + [f"{name}={PROMPT_VERSIONS.get(name, '0')}" for name in prompts])
+    
+    def is_fallback_analysis(self, analysis):
+        """Whether an analysis is the placeholder returned when Gemini could not answer"""
+        return analysis == self._get_fallback_analysis()
+    
+    def analyze_and_optimize(self, cv_text, job_description="", force_refresh=False):
+        """Return (analysis, optimized CV text)
+        
+        Uses one structured call that returns both, unless GEMINI_COMBINED_ANALYSIS
+        is off, in which case analyze_cv and generate_optimized_cv run in turn.
+        """
+        if not self.enabled or not getattr(settings, 'GEMINI_COMBINED_ANALYSIS', True):
+            analysis = self.analyze_cv(cv_text, job_description, force_refresh=force_refresh)
+            return analysis, self.generate_optimized_cv(cv_text, analysis, force_refresh=force_refresh)
+        
+        try:
+            prompt, builder = self.build_analysis_prompt(cv_text, job_description)
+            result = self._cached(
+                'analyze_and_optimize', [cv_text, job_description],
+                lambda: parse_json_response(self.generate(prompt, builder)), force_refresh
+            )
+        except Exception:
+            logger.exception('Gemini combined analysis failed')
+            return self._get_fallback_analysis(), self._get_fallback_optimized_cv(cv_text)
+        
+        analysis = dict(result)
+        optimized_cv = analysis.pop('optimized_cv', '')
+        if not optimized_cv:
+            optimized_cv = self.generate_optimized_cv(cv_text, analysis, force_refresh=force_refresh)
+        return analysis, optimized_cv
     
     def _get_fallback_optimized_cv(self, original_cv):
         return f"""
@@ -116,16 +353,17 @@ Original CV Content:
 {original_cv[:500]}...
 """
     
-    def find_matching_jobs(self, cv_analysis, location=""):
+    def find_matching_jobs(self, cv_analysis, location="", force_refresh=False):
         if not self.enabled:
             return self._parse_job_response("")
             
         try:
+            builder = PromptBuilder('find_matching_jobs')
             prompt = f"""
             Based on this CV analysis, suggest job search terms and job types:
             
-            Analysis: {cv_analysis}
-            Location: {location}
+            Analysis: {builder.data(cv_analysis, share=0.9, keys=ANALYSIS_KEYS)}
+            Location: {builder.text(location, share=0.1)}
             
             Provide JSON response:
             {{
@@ -136,21 +374,25 @@ Original CV Content:
             }}
             """
             
-            response = self.model.generate_content(prompt)
-            return json.loads(response.text)
+            return self._cached(
+                'find_matching_jobs', [cv_analysis, location],
+                lambda: parse_json_response(self.generate(prompt, builder)), force_refresh
+            )
         except Exception as e:
             print(f"Gemini job matching failed: {e}")
             return self._parse_job_response("")
     
-    def get_application_guide(self, job_title, company_name=""):
+    def get_application_guide(self, job_title, company_name="", portal="", force_refresh=False):
         if not self.enabled:
-            return f"Gemini API not configured. Please add your API key to use AI-powered guidance."
+            return self._get_fallback_guide(job_title)
             
         try:
+            builder = PromptBuilder('get_application_guide')
             prompt = f"""
             Provide a comprehensive job application guide for:
-            Job Title: {job_title}
-            Company: {company_name}
+            Job Title: {builder.text(job_title, share=0.4)}
+            Company: {builder.text(company_name, share=0.4)}
+            Applying via: {builder.text(portal, share=0.2)}
             
             Include:
             1. Application strategy
@@ -162,11 +404,63 @@ Original CV Content:
             Format as structured text.
             """
             
-            response = self.model.generate_content(prompt)
-            return response.text
+            return self._cached(
+                'get_application_guide', [job_title, company_name, portal],
+                lambda: self.generate(prompt, builder), force_refresh
+            )
         except Exception as e:
             print(f"Gemini guide generation failed: {e}")
-            return f"Application guide for {job_title} - Please configure Gemini API for detailed guidance."
+            return self._get_fallback_guide(job_title)
+    
+    def _get_fallback_guide(self, job_title):
+        if not self.enabled:
+            return "Gemini API not configured. Please add your API key to use AI-powered guidance."
+        return f"Application guide for {job_title} - Please configure Gemini API for detailed guidance."
+    
+    def is_fallback_guide(self, guide, job_title):
+        """Whether get_application_guide returned its placeholder instead of a generated guide"""
+        return guide == self._get_fallback_guide(job_title)
+    
+    def suggest_job_search(self, job_title, location="", skills="", experience="", cv_analysis=None, force_refresh=False):
+        if not self.enabled:
+            return self._get_fallback_job_search(job_title, skills)
+        
+        try:
+            builder = PromptBuilder('suggest_job_search')
+            prompt = f"""
+            Generate a smart job search for:
+            Job Title: {builder.text(job_title, share=0.1)}
+            Location: {builder.text(location, share=0.1)}
+            Skills: {builder.text(skills)}
+            Experience: {builder.text(experience)}
+            CV Analysis: {builder.data(cv_analysis, share=0.5, keys=ANALYSIS_KEYS)}
+            
+            Provide:
+            1. Optimized search keywords
+            2. Alternative job titles to search
+            3. Required skills to highlight
+            4. Salary expectations
+            5. Company recommendations
+            
+            Return as JSON format.
+            """
+            
+            return self._cached(
+                'suggest_job_search', [job_title, location, skills, experience, cv_analysis],
+                lambda: parse_json_response(self.generate(prompt, builder)), force_refresh
+            )
+        except Exception:
+            logger.exception('Gemini job search failed')
+            return self._get_fallback_job_search(job_title, skills)
+    
+    def _get_fallback_job_search(self, job_title, skills):
+        return {
+            'keywords': [job_title],
+            'alternative_titles': [job_title],
+            'skills': skills.split(',') if skills else [],
+            'salary_range': 'Competitive',
+            'companies': ['Top Companies']
+        }
     
     def _parse_response(self, text):
         # Fallback parser for non-JSON responses
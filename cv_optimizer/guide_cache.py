@@ -0,0 +1,104 @@
+"""
+Application guides shared across users.
+
+A guide depends only on the job, so it is stored once per normalized
+(title, company, portal) and every visitor reads that row. Expired guides
+are still served while a background task regenerates them
+(stale-while-revalidate), and the most viewed guides are refreshed before
+they expire by the prewarm_application_guides task.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from .gemini_service import GeminiCVAnalyzer
+from .models import ApplicationGuide
+
+REFRESH_LOCK_KEY = 'cv_optimizer:guide_refresh:{}'
+
+
+def normalize_guide_key(title, company='', portal=''):
+    """Case- and whitespace-insensitive key, so 'Data  Analyst' and 'data analyst' share a guide"""
+    def normalize(value, max_length):
+        return ' '.join((value or '').lower().split())[:max_length]
+    return normalize(title, 200), normalize(company, 200), normalize(portal, 100)
+
+
+def _ttl(is_fallback):
+    if is_fallback:
+        # Placeholders are retried soon rather than served for the full lifetime
+        return getattr(settings, 'APPLICATION_GUIDE_FALLBACK_TTL', 10 * 60)
+    return getattr(settings, 'APPLICATION_GUIDE_TTL', 7 * 24 * 60 * 60)
+
+
+def _generate(title, company, portal, force_refresh=False):
+    """Return (guide, is_fallback)"""
+    analyzer = GeminiCVAnalyzer()
+    guide = analyzer.get_application_guide(title, company, portal, force_refresh=force_refresh)
+    return guide, analyzer.is_fallback_guide(guide, title)
+
+
+def get_guide(title, company='', portal=''):
+    """Return the guide text for a job, generating it only for its first visitor"""
+    title, company, portal = normalize_guide_key(title, company, portal)
+    entry = ApplicationGuide.objects.filter(title=title, company=company, portal=portal).first()
+    if entry is None:
+        guide, is_fallback = _generate(title, company, portal)
+        try:
+            entry = ApplicationGuide.objects.create(
+                title=title, company=company, portal=portal, guide=guide,
+                expires_at=timezone.now() + timedelta(seconds=_ttl(is_fallback))
+            )
+        except IntegrityError:
+            # Another visitor stored it first
+            entry = ApplicationGuide.objects.get(title=title, company=company, portal=portal)
+    elif entry.expires_at <= timezone.now():
+        schedule_refresh(entry.pk)
+
+    ApplicationGuide.objects.filter(pk=entry.pk).update(view_count=F('view_count') + 1)
+    return entry.guide
+
+
+def schedule_refresh(guide_id):
+    """Queue one background refresh per guide, however many visitors see it expired"""
+    from .tasks import refresh_application_guide, run_in_background
+
+    if cache.add(REFRESH_LOCK_KEY.format(guide_id), 1, getattr(settings, 'GEMINI_FLIGHT_TIMEOUT', 60) * 2):
+        run_in_background(refresh_application_guide, guide_id)
+
+
+def refresh_guide(guide_id):
+    """Regenerate a stored guide; a placeholder never replaces a real guide"""
+    entry = ApplicationGuide.objects.filter(pk=guide_id).first()
+    if entry is None:
+        return
+    try:
+        guide, is_fallback = _generate(entry.title, entry.company, entry.portal, force_refresh=True)
+        now = timezone.now()
+        updates = {'expires_at': now + timedelta(seconds=_ttl(is_fallback))}
+        if not is_fallback:
+            updates.update(guide=guide, refreshed_at=now)
+        ApplicationGuide.objects.filter(pk=guide_id).update(**updates)
+    finally:
+        cache.delete(REFRESH_LOCK_KEY.format(guide_id))
+
+
+def prewarm_guides(limit=None, window=None):
+    """Refresh the most viewed guides that have expired or will within window seconds"""
+    limit = limit or getattr(settings, 'APPLICATION_GUIDE_PREWARM_COUNT', 50)
+    window = window or getattr(settings, 'APPLICATION_GUIDE_PREWARM_WINDOW', 2 * 60 * 60)
+    due = ApplicationGuide.objects.filter(
+        expires_at__lte=timezone.now() + timedelta(seconds=window), view_count__gt=0
+    ).order_by('-view_count').values_list('pk', flat=True)[:limit]
+
+    refreshed = 0
+    for guide_id in due:
+        # Skip guides a visitor already queued
+        if cache.add(REFRESH_LOCK_KEY.format(guide_id), 1, getattr(settings, 'GEMINI_FLIGHT_TIMEOUT', 60) * 2):
+            refresh_guide(guide_id)
+            refreshed += 1
+    return refreshed
@@ -3,6 +3,59 @@ from bs4 import BeautifulSoup
 from django.conf import settings
 import json
 from .gemini_service import GeminiCVAnalyzer
+from .guide_cache import get_guide
+
+# Static content, built once at import rather than on every guide view
+APPLICATION_CHECKLIST = [
+    'Customize resume for this role',
+    'Write targeted cover letter',
+    'Research company background',
+    'Prepare for common interview questions',
+    'Practice technical skills if required'
+]
+
+PORTAL_TIPS = {
+    'LinkedIn': [
+        'Optimize your LinkedIn profile',
+        'Connect with employees at the company',
+        'Use LinkedIn messaging for follow-ups'
+    ],
+    'Indeed': [
+        'Upload your resume to Indeed',
+        'Set up job alerts',
+        'Apply within 24-48 hours of posting'
+    ],
+    'Naukri': [
+        'Keep your profile updated',
+        'Use relevant keywords',
+        'Apply through mobile app for faster response'
+    ],
+    'Glassdoor': [
+        'Read company reviews',
+        'Check salary insights',
+        'Prepare for company-specific interview questions'
+    ]
+}
+DEFAULT_PORTAL_TIPS = ['Follow standard application process']
+
+JOB_RESOURCES = {
+    'courses': [
+        {'name': 'Python for Beginners', 'platform': 'Coursera', 'url': '#'},
+        {'name': 'Web Development Bootcamp', 'platform': 'Udemy', 'url': '#'}
+    ],
+    'certifications': [
+        {'name': 'AWS Certified Developer', 'provider': 'Amazon', 'url': '#'},
+        {'name': 'Google Cloud Professional', 'provider': 'Google', 'url': '#'}
+    ],
+    'practice_platforms': [
+        {'name': 'LeetCode', 'type': 'Coding Practice', 'url': 'https://leetcode.com'},
+        {'name': 'HackerRank', 'type': 'Technical Skills', 'url': 'https://hackerrank.com'}
+    ],
+    'interview_prep': [
+        {'name': 'Pramp', 'type': 'Mock Interviews', 'url': 'https://pramp.com'},
+        {'name': 'InterviewBit', 'type': 'Technical Prep', 'url': 'https://interviewbit.com'}
+    ]
+}
 
 class JobMatcher:
     def __init__(self):
@@ -105,69 +158,24 @@ class JobMatcher:
         return sample_jobs[:limit]
     
     def get_application_guide(self, job_data):
-        """Get AI-powered application guide for specific job"""
-        guide = self.gemini_analyzer.get_application_guide(
+        """Get AI-powered application guide for specific job, shared by everyone viewing it"""
+        guide = get_guide(
             job_data.get('title', ''),
-            job_data.get('company', '')
+            job_data.get('company', ''),
+            job_data.get('portal', '')
         )
         
         return {
             'guide': guide,
             'portal_specific_tips': self._get_portal_tips(job_data.get('portal', '')),
             'job_url': job_data.get('url', ''),
-            'application_checklist': [
-                'Customize resume for this role',
-                'Write targeted cover letter',
-                'Research company background',
-                'Prepare for common interview questions',
-                'Practice technical skills if required'
-            ]
+            'application_checklist': APPLICATION_CHECKLIST
         }
     
     def _get_portal_tips(self, portal):
         """Get portal-specific application tips"""
-        tips = {
-            'LinkedIn': [
-                'Optimize your LinkedIn profile',
-                'Connect with employees at the company',
-                'Use LinkedIn messaging for follow-ups'
-            ],
-            'Indeed': [
-                'Upload your resume to Indeed',
-                'Set up job alerts',
-                'Apply within 24-48 hours of posting'
-            ],
-            'Naukri': [
-                'Keep your profile updated',
-                'Use relevant keywords',
-                'Apply through mobile app for faster response'
-            ],
-            'Glassdoor': [
-                'Read company reviews',
-                'Check salary insights',
-                'Prepare for company-specific interview questions'
-            ]
-        }
-        return tips.get(portal, ['Follow standard application process'])
+        return PORTAL_TIPS.get(portal, DEFAULT_PORTAL_TIPS)
     
     def get_job_resources(self, job_title):
         """Get learning resources for job preparation"""
-        resources = {
-            'courses': [
-                {'name': 'Python for Beginners', 'platform': 'Coursera', 'url': '#'},
-                {'name': 'Web Development Bootcamp', 'platform': 'Udemy', 'url': '#'}
-            ],
-            'certifications': [
-                {'name': 'AWS Certified Developer', 'provider': 'Amazon', 'url': '#'},
-                {'name': 'Google Cloud Professional', 'provider': 'Google', 'url': '#'}
-            ],
-            'practice_platforms': [
-                {'name': 'LeetCode', 'type': 'Coding Practice', 'url': 'https://leetcode.com'},
-                {'name': 'HackerRank', 'type': 'Technical Skills', 'url': 'https://hackerrank.com'}
-            ],
-            'interview_prep': [
-                {'name': 'Pramp', 'type': 'Mock Interviews', 'url': 'https://pramp.com'},
-                {'name': 'InterviewBit', 'type': 'Technical Prep', 'url': 'https://interviewbit.com'}
-            ]
-        }
-        return resources
\ No newline at end of file
+        return JOB_RESOURCES
@@ -0,0 +1,121 @@
+from collections import deque
+from functools import lru_cache
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton that finds every keyword in a single pass over the text
+
+    Matches are case-insensitive and must sit on word boundaries, so "r" does
+    not match inside "react", "sql" does not match inside "mysql" and "js" does
+    not match inside "node.js".
+    synonyms maps alternative spellings ("js", "nodejs") to a keyword; they are
+    compiled into the same automaton and reported under that keyword.
+    """
+
+    def __init__(self, keywords, synonyms=None):
+        self.keywords = []
+        self._patterns = []
+        self._pattern_keyword = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        keyword_index = {}
+        for keyword in keywords:
+            pattern = keyword.lower()
+            if not pattern or pattern in keyword_index:
+                continue
+            keyword_index[pattern] = len(self.keywords)
+            self.keywords.append(pattern)
+            self._add_pattern(pattern, keyword_index[pattern])
+
+        seen = set(keyword_index)
+        for term, keyword in (synonyms or {}).items():
+            pattern = term.lower()
+            index = keyword_index.get(keyword.lower())
+            if not pattern or pattern in seen or index is None:
+                continue
+            seen.add(pattern)
+            self._add_pattern(pattern, index)
+        self._build_failure_links()
+
+    def _add_pattern(self, pattern, keyword_index):
+        index = len(self._patterns)
+        self._patterns.append(pattern)
+        self._pattern_keyword.append(keyword_index)
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(index)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Patterns ending at the failure state also end here
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text, lowered=False):
+        """Return {keyword: [start offsets]} for every keyword found in the text"""
+        if not lowered:
+            text = text.lower()
+
+        goto, fail, output = self._goto, self._fail, self._output
+        patterns, pattern_keyword, keywords = self._patterns, self._pattern_keyword, self.keywords
+        text_length = len(text)
+        matches = {}
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for index in output[state]:
+                pattern = patterns[index]
+                start = position - len(pattern) + 1
+                end = position + 1
+                if start > 0 and pattern[0].isalnum() and _joins_word(text, start - 1, -1):
+                    continue
+                if end < text_length and pattern[-1].isalnum() and _joins_word(text, end, 1):
+                    continue
+                starts = matches.setdefault(keywords[pattern_keyword[index]], [])
+                # "node" and "node.js" both match at one start but are a single mention
+                if not starts or starts[-1] != start:
+                    starts.append(start)
+        return matches
+
+    def count(self, text, lowered=False):
+        """Return {keyword: occurrences} for every keyword found in the text"""
+        return {keyword: len(starts) for keyword, starts in self.find(text, lowered).items()}
+
+
+def _joins_word(text, index, step):
+    """Whether text[index] continues the word next to a match, as in "mysql" or a dotted name like "node.js" """
+    char = text[index]
+    if char.isalnum():
+        return True
+    neighbour = index + step
+    return char == '.' and 0 <= neighbour < len(text) and text[neighbour].isalnum()
+
+
+@lru_cache(maxsize=64)
+def _cached_matcher(keywords, synonyms):
+    return KeywordMatcher(keywords, dict(synonyms))
+
+
+def get_keyword_matcher(keywords, synonyms=None):
+    """Return a compiled matcher for a keyword set and its synonyms, built once and cached"""
+    return _cached_matcher(tuple(keywords), tuple(sorted((synonyms or {}).items())))
@@ -0,0 +1,91 @@
+"""
+NumPy matrices relating documents, keywords and keyword sets.
+
+Keywords and synonym terms of every set are found in a single pass over each
+document. Synonyms are then credited per set, since a role-scoped synonym
+only counts for its own role, exactly as calculate_ats_score applies it.
+"""
+import numpy as np
+
+from .keyword_matcher import get_keyword_matcher
+from .text_normalization import as_normalized
+
+
+def build_weight_matrix(keyword_sets):
+    """Return (vocabulary, keyword x set weight matrix) for a list of keyword sets"""
+    index = {}
+    for keyword_set in keyword_sets:
+        for keyword in keyword_set['keywords']:
+            index.setdefault(keyword.lower(), len(index))
+
+    weights = np.zeros((len(index), len(keyword_sets)), dtype=np.float64)
+    for column, keyword_set in enumerate(keyword_sets):
+        keyword_weights = keyword_set.get('weights') or {}
+        for keyword in keyword_set['keywords']:
+            weights[index[keyword.lower()], column] = keyword_weights.get(keyword, 1)
+    return list(index), weights
+
+
+def _own_synonyms(keyword_set):
+    """The set's synonyms as (term, keyword), skipping terms that are keywords of the set itself"""
+    own = {keyword.lower() for keyword in keyword_set['keywords']}
+    for term, keyword in (keyword_set.get('synonyms') or {}).items():
+        term, keyword = term.lower(), keyword.lower()
+        if term and term not in own and keyword in own:
+            yield term, keyword
+
+
+def build_synonym_maps(keyword_sets, vocabulary):
+    """Return (terms, [term x keyword 0/1 matrix per set]) mapping each set's synonyms to its keywords"""
+    column = {keyword: position for position, keyword in enumerate(vocabulary)}
+    terms = {}
+    for keyword_set in keyword_sets:
+        for term, _ in _own_synonyms(keyword_set):
+            terms.setdefault(term, len(terms))
+
+    synonym_maps = []
+    for keyword_set in keyword_sets:
+        synonym_map = np.zeros((len(terms), len(vocabulary)), dtype=np.float64)
+        for term, keyword in _own_synonyms(keyword_set):
+            synonym_map[terms[term], column[keyword]] = 1
+        synonym_maps.append(synonym_map)
+    return list(terms), synonym_maps
+
+
+def build_scoring_matrices(keyword_sets):
+    """Return the vocabulary, weights and per-set synonym maps used by match_weights"""
+    vocabulary, weights = build_weight_matrix(keyword_sets)
+    terms, synonym_maps = build_synonym_maps(keyword_sets, vocabulary)
+    return {'vocabulary': vocabulary, 'weights': weights, 'terms': terms, 'synonym_maps': synonym_maps,
+            'totals': weights.sum(axis=0)}
+
+
+def build_presence_matrix(documents, vocabulary):
+    """Return a document x term matrix with 1 where the term occurs in the document"""
+    matcher = get_keyword_matcher(vocabulary)
+    column = {term: position for position, term in enumerate(vocabulary)}
+    presence = np.zeros((len(documents), len(vocabulary)), dtype=np.float64)
+    for row, document in enumerate(documents):
+        found = matcher.find(as_normalized(document)['words'], lowered=True)
+        presence[row, [column[term] for term in found]] = 1
+    return presence
+
+
+def match_weights(documents, matrices):
+    """Return a document x set matrix of the keyword weight each set finds in each document"""
+    vocabulary, terms = matrices['vocabulary'], matrices['terms']
+    # A synonym term can also be another set's keyword; it is matched once either way
+    known = set(vocabulary)
+    extra_terms = [term for term in terms if term not in known]
+    presence = build_presence_matrix(documents, vocabulary + extra_terms)
+    keyword_presence = presence[:, :len(vocabulary)]
+    if not terms:
+        return keyword_presence @ matrices['weights']
+
+    position = {term: index for index, term in enumerate(vocabulary + extra_terms)}
+    term_presence = presence[:, [position[term] for term in terms]]
+    matched = np.zeros((len(documents), len(matrices['synonym_maps'])), dtype=np.float64)
+    for column, synonym_map in enumerate(matrices['synonym_maps']):
+        found = np.maximum(keyword_presence, np.minimum(term_presence @ synonym_map, 1))
+        matched[:, column] = found @ matrices['weights'][:, column]
+    return matched
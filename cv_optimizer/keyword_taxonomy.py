@@ -0,0 +1,188 @@
+import hashlib
+import re
+import threading
+import uuid
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import IntegrityError, transaction
+
+from .models import ATSKeyword, JobRole, KeywordSynonym, TaxonomyVersion
+
+# Token that changes whenever an admin edits keywords or roles, so every
+# worker process notices and reloads its local copy. It lives in the cache
+# when that is shared between processes (e.g. Redis), otherwise in the
+# TaxonomyVersion row.
+VERSION_CACHE_KEY = 'cv_optimizer:keyword_taxonomy_version'
+
+_lock = threading.Lock()
+_taxonomy = None
+
+
+def normalize_role(job_role):
+    """Lowercase a job title and collapse punctuation to single spaces"""
+    return ' '.join(re.sub(r'[^a-z0-9+#.]+', ' ', job_role.lower()).split())
+
+
+def _fingerprint(keyword_weights, synonyms):
+    raw = '|'.join(f'{keyword}:{weight}' for keyword, weight in sorted(keyword_weights.items()))
+    raw += '|' + '|'.join(f'{term}={keyword}' for term, keyword in sorted(synonyms.items()))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def _load_taxonomy(version):
+    generic = {}
+    role_keywords = {}
+    aliases = {}
+    for role in JobRole.objects.all():
+        role_keywords[role.name] = {}
+        aliases[normalize_role(role.name)] = role.name
+        for alias in role.get_aliases():
+            aliases.setdefault(normalize_role(alias), role.name)
+
+    for keyword in ATSKeyword.objects.prefetch_related('roles'):
+        role_names = [role.name for role in keyword.roles.all()]
+        if not role_names:
+            generic[keyword.keyword] = keyword.weight
+        for name in role_names:
+            role_keywords[name][keyword.keyword] = keyword.weight
+
+    # Synonyms without a role apply wherever their keyword is used
+    generic_synonyms = {}
+    role_synonyms = {name: {} for name in role_keywords}
+    for term, keyword, role_name in KeywordSynonym.objects.values_list('term', 'keyword__keyword', 'role__name'):
+        if role_name is None:
+            generic_synonyms[term] = keyword
+        elif role_name in role_synonyms:
+            role_synonyms[role_name][term] = keyword
+
+    keyword_sets = {None: _make_keyword_set(None, generic, generic_synonyms)}
+    for name, weights in role_keywords.items():
+        # Role keywords first, then the generic ones, as the score breakdown lists them
+        combined = dict(weights)
+        for keyword, weight in generic.items():
+            combined.setdefault(keyword, weight)
+        synonyms = {**generic_synonyms, **role_synonyms[name]}
+        keyword_sets[name] = _make_keyword_set(name, combined, synonyms)
+
+    # Role-specific keywords alone, without the shared generic ones, tell roles apart
+    return {
+        'version': version,
+        'fingerprint': _taxonomy_fingerprint(keyword_sets, role_keywords, aliases),
+        'aliases': aliases,
+        'keyword_sets': keyword_sets,
+        'role_profiles': role_keywords,
+    }
+
+
+def _taxonomy_fingerprint(keyword_sets, role_profiles, aliases):
+    # Unlike the version token, the same keywords give the same fingerprint in every process
+    raw = '|'.join(f'{name}:{keyword_set["version"]}' for name, keyword_set in sorted(
+        keyword_sets.items(), key=lambda item: item[0] or ''
+    ))
+    raw += '|' + '|'.join(f'{name}:{_fingerprint(weights, {})}' for name, weights in sorted(role_profiles.items()))
+    raw += '|' + '|'.join(f'{alias}={name}' for alias, name in sorted(aliases.items()))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def _make_keyword_set(role, weights, synonyms):
+    # Only keep synonyms for keywords this set actually scores
+    synonyms = {term: keyword for term, keyword in synonyms.items() if keyword in weights}
+    return {
+        'role': role,
+        'keywords': list(weights),
+        'weights': weights,
+        'synonyms': synonyms,
+        'version': _fingerprint(weights, synonyms),
+    }
+
+
+def _cache_is_shared():
+    # A local-memory cache is private to each process and a dummy cache keeps nothing
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def _create_version_row(token):
+    """Create the TaxonomyVersion row, returning its token, which may be another process's"""
+    try:
+        with transaction.atomic():
+            TaxonomyVersion.objects.create(pk=1, token=token)
+    except IntegrityError:
+        return TaxonomyVersion.objects.get(pk=1).token
+    return token
+
+
+def _current_version():
+    if not _cache_is_shared():
+        version = TaxonomyVersion.objects.filter(pk=1).values_list('token', flat=True).first()
+        if version is None:
+            version = _create_version_row(uuid.uuid4().hex)
+        return version
+
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def get_taxonomy():
+    """Return the process-local taxonomy, reloading it only after keywords changed
+
+    'version' is the invalidation token the copy was loaded under; 'fingerprint'
+    identifies its contents and is stable across processes and restarts.
+    """
+    global _taxonomy
+    version = _current_version()
+    taxonomy = _taxonomy
+    if taxonomy is not None and taxonomy['version'] == version:
+        return taxonomy
+
+    with _lock:
+        if _taxonomy is None or _taxonomy['version'] != version:
+            _taxonomy = _load_taxonomy(version)
+        return _taxonomy
+
+
+def invalidate_taxonomy(**kwargs):
+    """Signal receiver: drop cached keyword sets in every process"""
+    global _taxonomy
+    if _cache_is_shared():
+        # Once the edit is committed, so no process reloads the old keywords under the new token
+        transaction.on_commit(lambda: cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None))
+    else:
+        # Written in the edit's own transaction, so it becomes visible together with the edit
+        token = uuid.uuid4().hex
+        if not TaxonomyVersion.objects.filter(pk=1).update(token=token):
+            _create_version_row(token)
+    _taxonomy = None
+
+
+def resolve_role(job_role):
+    """Map a free-text job title to a known role name through the alias index"""
+    aliases = get_taxonomy()['aliases']
+    normalized = normalize_role(job_role)
+    if normalized in aliases:
+        return aliases[normalized]
+
+    # Longest alias contained in the title, e.g. "Senior Software Developer (Remote)"
+    words = normalized.split()
+    for size in range(len(words) - 1, 0, -1):
+        for start in range(len(words) - size + 1):
+            role = aliases.get(' '.join(words[start:start + size]))
+            if role:
+                return role
+    return None
+
+
+def get_keyword_set(job_role):
+    """Return {'role', 'keywords', 'weights', 'synonyms', 'version'} for a job title"""
+    keyword_sets = get_taxonomy()['keyword_sets']
+    return keyword_sets.get(resolve_role(job_role), keyword_sets[None])
+
+
+def get_role_keyword_sets():
+    """Return the keyword set of every known role, ordered by role name"""
+    keyword_sets = get_taxonomy()['keyword_sets']
+    return [keyword_sets[name] for name in sorted(name for name in keyword_sets if name is not None)]
@@ -0,0 +1,151 @@
+"""
+Pluggable LLM backends behind GeminiCVAnalyzer.
+
+A backend has a model_name, generate(prompt, timeout=None) returning an
+object with .text and .candidates, and stream(prompt, timeout=None)
+yielding chunks with .text. GeminiClient is the real backend. With
+LLM_BACKEND = 'stub', LocalStubBackend answers locally instead. It has
+seeded, configurable latency, tail latency, error rate and chunked
+streaming, so the AI paths can be load-tested offline without spending
+API quota.
+"""
+import json
+import random
+import threading
+import time
+
+from django.conf import settings
+
+from .gemini_client import GeminiTimeout, get_gemini_client
+from .prompt_builder import estimate_tokens
+
+# Prompts with no JSON example to echo; matched by a phrase in the prompt
+DEFAULT_RESPONSES = {
+    'smart job search': json.dumps({
+        'keywords': ['python', 'django', 'rest api'],
+        'alternative_titles': ['Backend Developer', 'Python Developer'],
+        'skills': ['Python', 'Django', 'SQL'],
+        'salary_range': '$70,000 - $110,000',
+        'companies': ['Acme Corp', 'Globex'],
+    }),
+}
+
+STUB_PARAGRAPH = (
+    'PROFESSIONAL SUMMARY\n'
+    'Results-driven engineer with experience delivering reliable web applications.\n\n'
+    'EXPERIENCE\n'
+    '- Built and maintained Django services handling thousands of daily users.\n'
+    '- Reduced page load time by 40% through query optimization and caching.\n\n'
+    'SKILLS\n'
+    'Python, Django, REST APIs, PostgreSQL, Docker, Git\n\n'
+)
+
+_stub = None
+_stub_config = None
+_stub_lock = threading.Lock()
+
+
+class StubError(Exception):
+    pass
+
+
+class StubCandidate:
+    def __init__(self, token_count):
+        self.token_count = token_count
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+        self.candidates = [StubCandidate(estimate_tokens(text))]
+
+
+class LocalStubBackend:
+    def __init__(self, model_name='local-stub', latency=0.5, jitter=0.2, tail_rate=0.0, tail_latency=5.0,
+                 error_rate=0.0, chunk_count=20, chunk_delay=0.02, output_chars=2000, seed=0, responses=None):
+        self.model_name = model_name
+        self.model = None
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.chunk_count = max(chunk_count, 1)
+        self.chunk_delay = chunk_delay
+        self.output_chars = output_chars
+        self.responses = {**DEFAULT_RESPONSES, **(responses or {})}
+        self.calls = 0
+        self.failures = 0
+        # One seeded sequence per backend, so a run with the same seed sees the same delays and failures
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _plan(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.random() * self.jitter
+            if self._rng.random() < self.tail_rate:
+                delay = self.tail_latency
+            return delay, self._rng.random() < self.error_rate
+
+    def generate(self, prompt, timeout=None, **kwargs):
+        """Answer after the planned delay, honouring the deadline like GeminiClient"""
+        delay, fail = self._plan()
+        if timeout and delay > timeout:
+            time.sleep(timeout)
+            self._count_failure()
+            raise GeminiTimeout(f'Stub did not answer within {timeout:g}s')
+        time.sleep(delay)
+        if fail:
+            self._count_failure()
+            raise StubError('Injected stub failure')
+        return StubResponse(self.respond(prompt))
+
+    def _count_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def stream(self, prompt, timeout=None, **kwargs):
+        """Yield the answer in chunk_count pieces; the planned delay is the wait for the first one"""
+        text = self.generate(prompt, timeout=timeout).text
+        size = -(-len(text) // self.chunk_count)
+        for start in range(0, len(text), size):
+            if start:
+                time.sleep(self.chunk_delay)
+            yield StubResponse(text[start:start + size])
+
+    def respond(self, prompt):
+        """Canned answer: a configured response, else the prompt's own JSON example, else CV-like text"""
+        for phrase, response in self.responses.items():
+            if phrase in prompt:
+                return response
+
+        # Prompt templates end with an example of the JSON they expect
+        start = prompt.rfind('\n{')
+        if start != -1:
+            try:
+                example, _ = json.JSONDecoder().raw_decode(prompt[start + 1:])
+                return json.dumps(example)
+            except ValueError:
+                pass
+
+        repeats = self.output_chars // len(STUB_PARAGRAPH) + 1
+        return (STUB_PARAGRAPH * repeats)[:self.output_chars]
+
+
+def get_stub_backend():
+    """Return the process-wide stub, rebuilt whenever LLM_STUB changes"""
+    global _stub, _stub_config
+    config = dict(getattr(settings, 'LLM_STUB', {}))
+    with _stub_lock:
+        if _stub is None or config != _stub_config:
+            _stub = LocalStubBackend(**config)
+            _stub_config = config
+        return _stub
+
+
+def get_llm_backend():
+    """Return the configured backend, or None when the real one is not configured"""
+    if getattr(settings, 'LLM_BACKEND', 'gemini') == 'stub':
+        return get_stub_backend()
+    return get_gemini_client()
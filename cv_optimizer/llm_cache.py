@@ -0,0 +1,129 @@
+"""
+Persistent cache for LLM responses.
+
+Entries are keyed by the model name, the version of the prompt template and a
+hash of the prompt inputs, so editing a prompt only requires bumping its
+entry in PROMPT_VERSIONS. They expire after LLM_CACHE_TTL seconds, and the
+least recently used rows are dropped once LLM_CACHE_MAX_ENTRIES is exceeded.
+"""
+import hashlib
+import json
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .llm_gateway import single_flight
+from .models import LLMResponse
+
+logger = logging.getLogger(__name__)
+
+# Bump a prompt's version whenever its template changes so stale answers are not reused
+PROMPT_VERSIONS = {
+    'analyze_cv': '2',
+    'generate_optimized_cv': '2',
+    'analyze_and_optimize': '2',
+    'find_matching_jobs': '2',
+    'get_application_guide': '3',
+    'suggest_job_search': '1',
+}
+
+# Writes retried when SQLite reports the database as locked by another writer
+STORE_ATTEMPTS = 3
+
+
+def make_key(model_name, prompt_name, inputs):
+    """Hash of everything that determines a response"""
+    raw = json.dumps(
+        [model_name, prompt_name, PROMPT_VERSIONS.get(prompt_name, '0'), inputs],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def get_response(cache_key):
+    """Return the stored response for a key, or None when missing or expired"""
+    now = timezone.now()
+    entry = LLMResponse.objects.filter(cache_key=cache_key, expires_at__gt=now).values('id', 'response').first()
+    if entry is None:
+        return None
+    LLMResponse.objects.filter(id=entry['id']).update(hit_count=F('hit_count') + 1, last_used_at=now)
+    return entry['response']
+
+
+def has_response(cache_key):
+    """Whether an unexpired response is stored, without counting a hit"""
+    return LLMResponse.objects.filter(cache_key=cache_key, expires_at__gt=timezone.now()).exists()
+
+
+def store_response(cache_key, model_name, prompt_name, response, usage=None):
+    """Save a response; usage holds the token estimates recorded for the call"""
+    now = timezone.now()
+    ttl = getattr(settings, 'LLM_CACHE_TTL', 7 * 24 * 60 * 60)
+    values = {
+        'model_name': model_name,
+        'prompt_name': prompt_name,
+        'prompt_version': PROMPT_VERSIONS.get(prompt_name, '0'),
+        'response': response,
+        'last_used_at': now,
+        'expires_at': now + timedelta(seconds=ttl),
+        **(usage or {}),
+    }
+    for attempt in range(1, STORE_ATTEMPTS + 1):
+        try:
+            _write_response(cache_key, values)
+            break
+        except OperationalError as e:
+            if 'locked' not in str(e) or attempt == STORE_ATTEMPTS:
+                raise
+            time.sleep(0.1 * attempt)
+    prune_responses()
+
+
+def _write_response(cache_key, values):
+    # update_or_create reads before it writes in one transaction; SQLite fails such a transaction
+    # at once if another connection is writing, whereas a plain INSERT waits for its turn
+    try:
+        with transaction.atomic():
+            LLMResponse.objects.create(cache_key=cache_key, **values)
+    except IntegrityError:
+        # Stored before (force_refresh) or by another worker meanwhile: keep the newest answer
+        LLMResponse.objects.filter(cache_key=cache_key).update(**values)
+
+
+def prune_responses():
+    """Delete expired entries, then the least recently used ones beyond the size limit"""
+    LLMResponse.objects.filter(expires_at__lte=timezone.now()).delete()
+    max_entries = getattr(settings, 'LLM_CACHE_MAX_ENTRIES', 5000)
+    if LLMResponse.objects.count() > max_entries:
+        stale_ids = list(LLMResponse.objects.order_by('-last_used_at').values_list('id', flat=True)[max_entries:])
+        LLMResponse.objects.filter(id__in=stale_ids).delete()
+
+
+def cached_call(model_name, prompt_name, inputs, generate, force_refresh=False, usage=None):
+    """Return a stored response for these inputs, or call generate() and store its result
+
+    force_refresh skips the lookup but still stores the new response. usage()
+    is called after generate() and returns the token estimates to store with it.
+    Concurrent calls with the same key share a single generate().
+    """
+    cache_key = make_key(model_name, prompt_name, inputs)
+    if not force_refresh:
+        response = get_response(cache_key)
+        if response is not None:
+            return response
+
+    def generate_and_store():
+        response = generate()
+        try:
+            store_response(cache_key, model_name, prompt_name, response, usage() if usage else None)
+        except Exception:
+            # A failed write must not lose an answer we already paid for
+            logger.exception('Could not store %s response in the LLM cache', prompt_name)
+        return response
+
+    return single_flight(cache_key, generate_and_store, lambda: get_response(cache_key))
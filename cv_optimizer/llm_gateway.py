@@ -0,0 +1,143 @@
+"""
+Traffic control for Gemini calls.
+
+single_flight() makes concurrent identical requests share one call: threads
+in this process wait on the first caller, other processes wait on a lock in
+the shared cache and then read the stored response. acquire() takes a slot
+from a token bucket kept in the shared cache (GEMINI_GATEWAY_CACHE), so the
+requests-per-minute limit holds across every worker using that cache; with
+the local-memory backend each process enforces it on its own. Callers queue
+for a slot for up to GEMINI_QUEUE_TIMEOUT seconds and are shed with
+GeminiOverloaded when the wait would be longer.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = 'cv_optimizer:gemini:bucket'
+FLIGHT_KEY = 'cv_optimizer:gemini:flight:{}'
+POLL_INTERVAL = 0.1
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+class GeminiOverloaded(Exception):
+    pass
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _cache():
+    return caches[getattr(settings, 'GEMINI_GATEWAY_CACHE', 'default')]
+
+
+def single_flight(key, compute, lookup):
+    """Return compute() for key, sharing one call among concurrent identical requests
+
+    compute() must store its result where lookup() finds it, since callers in
+    other processes read it back with lookup() once the first call finishes.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        if not flight.done.wait(getattr(settings, 'GEMINI_FLIGHT_TIMEOUT', 60)):
+            raise GeminiOverloaded('Timed out waiting for an identical Gemini request')
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = _run_once_across_processes(key, compute, lookup)
+        return flight.result
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        flight.done.set()
+        with _flights_lock:
+            _flights.pop(key, None)
+
+
+def _run_once_across_processes(key, compute, lookup):
+    cache = _cache()
+    lock_key = FLIGHT_KEY.format(key)
+    timeout = getattr(settings, 'GEMINI_FLIGHT_TIMEOUT', 60)
+    if not cache.add(lock_key, 1, timeout):
+        # Another process is making this call; its result is stored before the lock is released
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and cache.get(lock_key) is not None:
+            time.sleep(POLL_INTERVAL)
+        result = lookup()
+        if result is not None:
+            return result
+        # The other call failed or timed out; make our own
+        cache.add(lock_key, 1, timeout)
+
+    try:
+        return compute()
+    finally:
+        cache.delete(lock_key)
+
+
+def _reserve(cache, rate, burst, max_wait):
+    """Reserve the next slot in the shared bucket
+
+    Returns the seconds to wait before using it (0 when a token is free), or
+    None without reserving when the slot is more than max_wait away. Waiting
+    callers leave the bucket negative, so each one waits for its own slot.
+    """
+    lock_key = f'{BUCKET_KEY}:lock'
+    deadline = time.monotonic() + 1
+    while not cache.add(lock_key, 1, 2):
+        if time.monotonic() > deadline:
+            # A holder that died leaves the lock to expire; do not stall on it
+            break
+        time.sleep(0.005)
+
+    try:
+        now = time.time()
+        state = cache.get(BUCKET_KEY) or {'tokens': burst, 'updated': now}
+        tokens = min(burst, state['tokens'] + (now - state['updated']) * rate)
+        wait = max(1 - tokens, 0) / rate
+        if wait > max_wait:
+            return None
+        cache.set(BUCKET_KEY, {'tokens': tokens - 1, 'updated': now}, None)
+        return wait
+    finally:
+        cache.delete(lock_key)
+
+
+def acquire(max_wait=None):
+    """Wait for a rate-limit slot, raising GeminiOverloaded rather than queueing too long
+
+    Waits at most max_wait seconds (default GEMINI_QUEUE_TIMEOUT) and returns
+    the seconds spent waiting.
+    """
+    per_minute = getattr(settings, 'GEMINI_RATE_LIMIT', 60)
+    if not per_minute:
+        return 0
+
+    queue_timeout = getattr(settings, 'GEMINI_QUEUE_TIMEOUT', 10) if max_wait is None else max_wait
+    burst = max(getattr(settings, 'GEMINI_RATE_BURST', 10), 1)
+    wait = _reserve(_cache(), per_minute / 60, burst, queue_timeout)
+    if wait is None:
+        logger.warning('Shedding Gemini request: no capacity within %gs', queue_timeout)
+        raise GeminiOverloaded(f'No Gemini capacity within {queue_timeout:g}s')
+    if wait:
+        time.sleep(wait)
+    return wait
@@ -0,0 +1,144 @@
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from cv_optimizer.circuit_breaker import get_gemini_breaker
+from cv_optimizer.llm_backends import get_stub_backend
+from cv_optimizer.models import CVUpload
+
+PATHS = ('upload', 'regenerate', 'job_search')
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Load-test the AI request paths against the local LLM stub and report throughput and tail latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='Existing user to send the requests as')
+        parser.add_argument('--cv-file', help='CV to upload and regenerate (default: first uploaded original)')
+        parser.add_argument('--paths', nargs='+', choices=PATHS, default=list(PATHS))
+        parser.add_argument('--requests', type=int, default=20, help='Requests per path')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--latency', type=float, help='Stub latency in seconds (default: LLM_STUB)')
+        parser.add_argument('--error-rate', type=float, help='Share of stub calls that fail (default: LLM_STUB)')
+        parser.add_argument('--tail-rate', type=float, help='Share of stub calls that take the tail latency')
+        parser.add_argument('--rate-limit', type=int, default=0,
+                            help='GEMINI_RATE_LIMIT during the run (default 0: measure without rate limiting)')
+        parser.add_argument('--live', action='store_true',
+                            help='Use the configured LLM backend instead of the stub (spends API quota)')
+        parser.add_argument('--keep', action='store_true', help='Keep the CVs created by the run')
+
+    def handle(self, *args, **options):
+        user = CustomUser.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"No user named {options['username']!r}.")
+        cv_file = options['cv_file'] or self._default_cv_file()
+
+        stub_config = dict(getattr(settings, 'LLM_STUB', {}))
+        for option, key in (('latency', 'latency'), ('error_rate', 'error_rate'), ('tail_rate', 'tail_rate')):
+            if options[option] is not None:
+                stub_config[key] = options[option]
+        overrides = {'GEMINI_RATE_LIMIT': options['rate_limit']}
+        if not options['live']:
+            overrides.update(LLM_BACKEND='stub', LLM_STUB=stub_config)
+
+        # Keeps titles from earlier runs, still in the LLM cache, from answering this one
+        self.run_id = int(time.time())
+        first_new_id = (CVUpload.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        try:
+            with override_settings(**overrides):
+                get_gemini_breaker().reset()
+                target = self._create_cv(user, cv_file)
+                for path in options['paths']:
+                    self._run(path, user, target, cv_file, options)
+                if not options['live']:
+                    stub = get_stub_backend()
+                    # Failed calls still return 200 with a fallback answer, so they are counted here
+                    self.stdout.write(f'Stub calls: {stub.calls}, failed or timed out: {stub.failures}')
+                self.stdout.write(f"Circuit breaker: {get_gemini_breaker().get_state()['state']}")
+        finally:
+            get_gemini_breaker().reset()
+            if not options['keep']:
+                created = CVUpload.objects.filter(user=user, id__gte=first_new_id)
+                for cv_upload in created:
+                    cv_upload.original_cv.delete(save=False)
+                created.delete()
+
+    def _default_cv_file(self):
+        directory = os.path.join(settings.MEDIA_ROOT, 'cvs', 'original')
+        names = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+        if not names:
+            raise CommandError('No uploaded CVs found; pass --cv-file.')
+        return os.path.join(directory, names[0])
+
+    def _create_cv(self, user, cv_file):
+        cv_upload = CVUpload(user=user, job_role='Software Developer', status=CVUpload.STATUS_COMPLETED)
+        with open(cv_file, 'rb') as f:
+            cv_upload.original_cv.save(os.path.basename(cv_file), File(f), save=False)
+        cv_upload.save()
+        return cv_upload
+
+    def _run(self, path, user, target, cv_file, options):
+        local = threading.local()
+
+        def client():
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.client.force_login(user)
+            return local.client
+
+        def request(index):
+            started = time.perf_counter()
+            try:
+                ok = getattr(self, f'_request_{path}')(client(), index, target, cv_file)
+            except Exception as e:
+                self.stderr.write(f'{path} #{index}: {e}')
+                ok = False
+            finally:
+                connections.close_all()
+            return time.perf_counter() - started, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(request, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        latencies = [duration * 1000 for duration, _ in results]
+        errors = sum(1 for _, ok in results if not ok)
+        self.stdout.write(
+            f'{path:<11} {len(results) / elapsed:6.2f} req/s  '
+            f'p50 {statistics.median(latencies):8.1f} ms  p95 {percentile(latencies, 0.95):8.1f} ms  '
+            f'p99 {percentile(latencies, 0.99):8.1f} ms  max {max(latencies):8.1f} ms  errors {errors}'
+        )
+
+    def _request_upload(self, client, index, target, cv_file):
+        # Uploads of the same file share cached and coalesced analysis, as repeat uploads do in production
+        with open(cv_file, 'rb') as f:
+            response = client.post(reverse('cv_optimizer:upload'), {'job_role': 'Software Developer', 'original_cv': f})
+        return response.status_code == 302
+
+    def _request_regenerate(self, client, index, target, cv_file):
+        # force_refresh skips the LLM cache; concurrent requests still share one call, as in production
+        response = client.post(reverse('cv_optimizer:regenerate_analysis', args=[target.id]), {'force_refresh': '1'})
+        return response.json().get('success', False)
+
+    def _request_job_search(self, client, index, target, cv_file):
+        # A distinct title per request keeps the LLM cache from answering
+        response = client.post(reverse('cv_optimizer:custom_job_search'), {
+            'job_title': f'Python Developer {self.run_id}-{index}', 'location': 'Remote', 'skills': 'python, django',
+        })
+        return response.json().get('success', False)
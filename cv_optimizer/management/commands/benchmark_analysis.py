@@ -0,0 +1,126 @@
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cv_optimizer.keyword_taxonomy import get_keyword_set
+from cv_optimizer.text_normalization import normalize_text
+from cv_optimizer.utils import (
+    analyze_cv_structure, calculate_ats_score, extract_text_from_file, generate_suggestions, is_extraction_error
+)
+
+
+# Same pattern as NLTK's wordpunct_tokenize, for installs without nltk (no longer a requirement)
+WORDPUNCT_PATTERN = re.compile(r'\w+|[^\w\s]+')
+
+
+def legacy_tokenize(text):
+    """Tokenizer used by the previous scoring code (NLTK punkt when installed)"""
+    try:
+        from nltk.tokenize import word_tokenize
+        return word_tokenize(text)
+    except (ImportError, LookupError):
+        return WORDPUNCT_PATTERN.findall(text)
+
+
+def legacy_calculate_ats_score(cv_text, job_keywords):
+    """Previous scoring: tokenize and discard, then two substring scans per keyword"""
+    cv_text_lower = cv_text.lower()
+    cv_words = [word for word in legacy_tokenize(cv_text_lower) if word.isalnum()]
+    matched_keywords = [kw for kw in job_keywords if kw.lower() in cv_text_lower]
+    score = min((len(matched_keywords) / len(job_keywords)) * 100, 100) if job_keywords else 0
+    return {
+        'score': round(score, 2),
+        'matched_keywords': matched_keywords,
+        'total_keywords': len(job_keywords),
+        'missing_keywords': [kw for kw in job_keywords if kw.lower() not in cv_text_lower]
+    }
+
+
+def legacy_analyze_cv_structure(cv_text):
+    """Previous structure analysis: the text is lowercased once per section check"""
+    return {
+        'has_contact_info': bool(re.search(r'[\w\.-]+@[\w\.-]+\.\w+', cv_text)),
+        'has_phone': bool(re.search(r'[\+]?[1-9]?[0-9]{7,14}', cv_text)),
+        'has_experience_section': any(word in cv_text.lower() for word in ['experience', 'work history', 'employment']),
+        'has_education_section': any(word in cv_text.lower() for word in ['education', 'qualification', 'degree']),
+        'has_skills_section': any(word in cv_text.lower() for word in ['skills', 'technical skills', 'competencies']),
+        'word_count': len(cv_text.split()),
+        'has_bullet_points': '•' in cv_text or '*' in cv_text or '-' in cv_text
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-stage CV analysis time for the legacy and the shared-normalization pipelines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='CV files or directories (default: uploaded originals)')
+        parser.add_argument('--role', default='Software Developer', help='Job role to score against')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per document')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or [os.path.join(settings.MEDIA_ROOT, 'cvs', 'original')]
+        texts = [text for text in (extract_text_from_file(path) for path in self._collect_files(paths))
+                 if not is_extraction_error(text)]
+        if not texts:
+            raise CommandError('No readable CVs found.')
+
+        keyword_set = get_keyword_set(options['role'])
+        keywords, weights, synonyms = keyword_set['keywords'], keyword_set['weights'], keyword_set['synonyms']
+        repeat = options['repeat']
+        self.stdout.write(f'{len(texts)} CVs x {repeat} runs against {len(keywords)} keywords')
+
+        legacy = {'normalize': 0.0, 'score': 0.0, 'structure': 0.0, 'suggestions': 0.0}
+        shared = dict(legacy)
+        for _ in range(repeat):
+            for text in texts:
+                started = time.perf_counter()
+                score = legacy_calculate_ats_score(text, keywords)
+                legacy['score'] += time.perf_counter() - started
+
+                started = time.perf_counter()
+                structure = legacy_analyze_cv_structure(text)
+                legacy['structure'] += time.perf_counter() - started
+
+                started = time.perf_counter()
+                generate_suggestions(score, structure)
+                legacy['suggestions'] += time.perf_counter() - started
+
+                started = time.perf_counter()
+                normalized = normalize_text(text)
+                shared['normalize'] += time.perf_counter() - started
+
+                started = time.perf_counter()
+                score = calculate_ats_score(normalized, keywords, weights, synonyms)
+                shared['score'] += time.perf_counter() - started
+
+                started = time.perf_counter()
+                structure = analyze_cv_structure(normalized)
+                shared['structure'] += time.perf_counter() - started
+
+                started = time.perf_counter()
+                generate_suggestions(score, structure)
+                shared['suggestions'] += time.perf_counter() - started
+
+        runs = repeat * len(texts)
+        self.stdout.write(f'{"stage":<12} {"before (ms)":>12} {"after (ms)":>12}')
+        for stage in legacy:
+            self.stdout.write(f'{stage:<12} {legacy[stage] * 1000 / runs:12.3f} {shared[stage] * 1000 / runs:12.3f}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{"total":<12} {sum(legacy.values()) * 1000 / runs:12.3f} {sum(shared.values()) * 1000 / runs:12.3f}'
+        ))
+        self.stdout.write('Normalization runs once per file; later analyses reuse the cached result.')
+
+    def _collect_files(self, paths):
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                             if name.lower().endswith(('.pdf', '.docx')))
+            elif os.path.isfile(path):
+                files.append(path)
+            else:
+                raise CommandError(f'No such file or directory: {path}')
+        return files
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from docx import Document
+
+from cv_optimizer.utils import extract_text_from_docx
+
+
+def extract_text_with_python_docx(file_path):
+    """Previous implementation: full python-docx DOM, body paragraphs only"""
+    doc = Document(file_path)
+    text = ""
+    for paragraph in doc.paragraphs:
+        text += paragraph.text + "\n"
+    return text
+
+
+class Command(BaseCommand):
+    help = 'Benchmark streaming DOCX extraction against python-docx on a corpus of resumes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='DOCX files or directories containing them')
+        parser.add_argument('--synthetic', type=int, default=0, help='Generate this many synthetic resumes to benchmark')
+        parser.add_argument('--repeat', type=int, default=5, help='Extraction runs per file')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            files = self._collect_files(options['paths'])
+            files += self._generate_resumes(tmp_dir, options['synthetic'])
+            if not files:
+                raise CommandError('No DOCX files given. Pass paths or use --synthetic N.')
+
+            self.stdout.write(f'Benchmarking {len(files)} DOCX files, {options["repeat"]} runs each')
+            results = {}
+            for name, extractor in (('python-docx', extract_text_with_python_docx),
+                                    ('streaming', extract_text_from_docx)):
+                results[name] = self._measure(extractor, files, options['repeat'])
+                seconds, peak, chars = results[name]
+                self.stdout.write(
+                    f'{name:<12} {seconds * 1000:9.1f} ms total  '
+                    f'{peak / 1024:9.1f} KiB peak  {chars:9d} chars extracted'
+                )
+
+        baseline, streaming = results['python-docx'], results['streaming']
+        if streaming[0]:
+            self.stdout.write(self.style.SUCCESS(
+                f'Speed-up: {baseline[0] / streaming[0]:.1f}x, '
+                f'peak memory: {streaming[1] / max(baseline[1], 1):.0%} of python-docx'
+            ))
+
+    def _collect_files(self, paths):
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, names in os.walk(path):
+                    files.extend(os.path.join(root, name) for name in sorted(names) if name.lower().endswith('.docx'))
+            elif os.path.isfile(path):
+                files.append(path)
+            else:
+                raise CommandError(f'No such file or directory: {path}')
+        return files
+
+    def _generate_resumes(self, tmp_dir, count):
+        files = []
+        for index in range(count):
+            doc = Document()
+            doc.add_heading(f'Candidate {index}', level=0)
+            doc.add_paragraph(f'candidate{index}@example.com | +91 98765 4321{index % 10}')
+            doc.add_heading('Experience', level=1)
+            for job in range(8):
+                doc.add_paragraph(f'Software Engineer {job} at Company {job}, 20{10 + job} - 20{11 + job}')
+                for bullet in range(5):
+                    doc.add_paragraph(f'Delivered project {bullet} using Python, Django and SQL', style='List Bullet')
+            doc.add_heading('Skills', level=1)
+            table = doc.add_table(rows=6, cols=3)
+            for row in table.rows:
+                for cell, skill in zip(row.cells, ('Python', 'Kubernetes', 'PostgreSQL')):
+                    cell.text = skill
+            path = os.path.join(tmp_dir, f'resume_{index}.docx')
+            doc.save(path)
+            files.append(path)
+        return files
+
+    def _measure(self, extractor, files, repeat):
+        chars = sum(len(extractor(path)) for path in files)
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for path in files:
+                extractor(path)
+        seconds = time.perf_counter() - started
+
+        peak = 0
+        for path in files:
+            tracemalloc.start()
+            extractor(path)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        return seconds, peak, chars
@@ -0,0 +1,75 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cv_optimizer.cv_sections import find_email, find_phone, segment_cv
+from cv_optimizer.utils import analyze_cv_structure
+
+SYMBOLS = '@.-_+|:•*#=()[]<>/\\'
+
+
+def adversarial_inputs(size, rng):
+    """Inputs that make naive email, phone and heading patterns backtrack"""
+    yield 'symbol run', ''.join(rng.choice(SYMBOLS) for _ in range(size))
+    yield 'dots then @', 'a.' * (size // 2) + '@'
+    yield 'at signs', 'a@' * (size // 2)
+    yield 'domain run', 'x@' + 'a.' * (size // 2)
+    yield 'digit run', '9' * size
+    yield 'phone-like', '+1 ' * (size // 3)
+    yield 'heading lines', 'SKILLS:\nEXPERIENCE\n' * (size // 19)
+    yield 'one long line', 'Experience ' * (size // 11)
+    yield 'random printable', ''.join(rng.choice(string.printable) for _ in range(size))
+
+
+class Command(BaseCommand):
+    help = 'Fuzz the CV segmenter and contact regexes to check they stay linear-time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=20000, help='Size of the smaller input in characters')
+        parser.add_argument('--growth', type=int, default=10, help='Factor between the small and large input')
+        parser.add_argument('--max-ratio', type=float, default=30.0,
+                            help='Fail if the large input is this many times slower than the small one')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        small, growth = options['size'], options['growth']
+        failures = []
+
+        small_inputs = dict(adversarial_inputs(small, random.Random(options['seed'])))
+        large_inputs = dict(adversarial_inputs(small * growth, random.Random(options['seed'])))
+        for name, small_text in small_inputs.items():
+            small_time = self._time(small_text)
+            large_time = self._time(large_inputs[name])
+            ratio = large_time / max(small_time, 1e-6)
+            self.stdout.write(f'{name:<18} {small_time * 1000:9.2f} ms -> {large_time * 1000:9.2f} ms  (x{ratio:.1f})')
+            if ratio > options['max_ratio']:
+                failures.append(f'{name}: {ratio:.1f}x slower for {growth}x more input')
+
+            problem = self._check_sections(large_inputs[name])
+            if problem:
+                failures.append(f'{name}: {problem}')
+
+        if failures:
+            raise CommandError('Segmenter fuzzing failed:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('No super-linear slowdowns found.'))
+
+    def _time(self, text):
+        started = time.perf_counter()
+        segment_cv(text)
+        find_email(text)
+        find_phone(text)
+        analyze_cv_structure(text)
+        return time.perf_counter() - started
+
+    def _check_sections(self, text):
+        sections = segment_cv(text)
+        if not sections:
+            return 'no sections returned' if text else None
+        if sections[0]['start'] != 0 or sections[-1]['end'] != len(text):
+            return 'sections do not cover the whole text'
+        for previous, current in zip(sections, sections[1:]):
+            if previous['end'] != current['start']:
+                return 'sections are not contiguous'
+        return None
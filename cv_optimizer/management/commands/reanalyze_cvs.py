@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from cv_optimizer.bulk_reanalysis import estimate_cost, reanalyze, select_outdated
+from cv_optimizer.models import CVUpload
+
+
+class Command(BaseCommand):
+    help = ('Re-run keyword scoring and Gemini analysis for CVs analyzed with older prompts or keywords. '
+            'CVs already current are skipped, so an interrupted run can simply be started again.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', type=int, nargs='+', help='Only these CVUpload ids')
+        parser.add_argument('--user', help='Only CVs of this username')
+        parser.add_argument('--role', help='Only CVs whose job role contains this text')
+        parser.add_argument('--status', choices=[CVUpload.STATUS_COMPLETED, CVUpload.STATUS_FAILED])
+        parser.add_argument('--since', help='Only CVs uploaded on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--limit', type=int, help='Re-analyze at most this many CVs, oldest first')
+        parser.add_argument('--force', action='store_true', help='Include CVs whose analysis is already current')
+        parser.add_argument('--force-refresh', action='store_true',
+                            help='Call Gemini even when an identical response is cached')
+        parser.add_argument('--dry-run', action='store_true', help='Estimate calls, tokens and cost without calling Gemini')
+        parser.add_argument('--concurrency', type=int, help='Gemini calls in flight (default: REANALYSIS_CONCURRENCY)')
+        parser.add_argument('--processes', type=int, help='Text extraction processes (default: CPU count, 0 for none)')
+        parser.add_argument('--batch-size', type=int, help='CVs per bulk update (default: REANALYSIS_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        queryset = CVUpload.objects.all()
+        if options['ids']:
+            queryset = queryset.filter(pk__in=options['ids'])
+        if options['user']:
+            queryset = queryset.filter(user__username=options['user'])
+        if options['role']:
+            queryset = queryset.filter(job_role__icontains=options['role'])
+        if options['status']:
+            queryset = queryset.filter(status=options['status'])
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since date {options['since']!r}; use YYYY-MM-DD.")
+            queryset = queryset.filter(created_at__date__gte=since)
+
+        cv_ids, current = select_outdated(queryset, force=options['force'])
+        if options['limit']:
+            cv_ids = cv_ids[:options['limit']]
+        self.stdout.write(f'{len(cv_ids)} CVs to re-analyze, {current} already current.')
+        if not cv_ids:
+            return
+
+        if options['dry_run']:
+            estimate = estimate_cost(cv_ids, options['force_refresh'], options['processes'])
+            self.stdout.write(
+                f"Gemini calls: {estimate['calls']} ({estimate['cached']} answered from the cache, "
+                f"{estimate['unreadable']} unreadable)\n"
+                f"Estimated tokens: ~{estimate['input_tokens']} input, ~{estimate['output_tokens']} output\n"
+                f"Estimated cost: ~${estimate['cost']:.2f}\n"
+                f"Minimum duration at the rate limit: ~{estimate['minimum_minutes']:.1f} min"
+            )
+            return
+
+        def progress(done, total, updated, failed, elapsed):
+            remaining = elapsed / done * (total - done)
+            self.stdout.write(
+                f'{done}/{total} CVs: {updated} updated, {failed} failed, '
+                f'{elapsed:.1f}s elapsed, ~{remaining:.0f}s left'
+            )
+
+        updated, failed = reanalyze(
+            cv_ids, concurrency=options['concurrency'], processes=options['processes'],
+            batch_size=options['batch_size'], force_refresh=options['force_refresh'], progress=progress
+        )
+        self.stdout.write(self.style.SUCCESS(f'Re-analyzed {updated} CVs.'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} CVs failed and keep their previous analysis; run again to retry them.'))
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_optimizer', '0005_cvupload_stored_analysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='extractedtext',
+            name='page_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='extractedtext',
+            name='skipped_pages',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='extractedtext',
+            name='truncated',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:01
+
+from django.db import migrations, models
+
+
+def mark_existing_completed(apps, schema_editor):
+    # Uploads made before the background pipeline were analyzed synchronously
+    CVUpload = apps.get_model('cv_optimizer', 'CVUpload')
+    CVUpload.objects.update(status='completed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_optimizer', '0006_extractedtext_page_budget'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cvupload',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Queued'), ('extracting', 'Extracting text'), ('scoring', 'Scoring keywords'), ('analyzing', 'AI analysis'), ('optimizing', 'Generating optimized CV'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='cvupload',
+            name='status_message',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(mark_existing_completed, migrations.RunPython.noop),
+    ]
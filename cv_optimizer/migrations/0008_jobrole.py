@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_optimizer', '0007_cvupload_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobRole',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('aliases', models.TextField(blank=True, help_text='Comma-separated alternative job titles, e.g. "software engineer, programmer"')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='atskeyword',
+            name='roles',
+            field=models.ManyToManyField(blank=True, related_name='keywords', to='cv_optimizer.jobrole'),
+        ),
+    ]
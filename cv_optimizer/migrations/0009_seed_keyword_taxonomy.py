@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:03
+
+from django.db import migrations
+
+
+ROLE_KEYWORDS = {
+    'Software Developer': {
+        'aliases': 'software engineer, software engineering, software development, programmer, web developer, '
+                   'full stack developer, backend developer, frontend developer',
+        'keywords': [
+            'python', 'java', 'javascript', 'react', 'node.js', 'sql', 'git', 'agile',
+            'api', 'database', 'frontend', 'backend', 'full-stack', 'programming',
+            'software development', 'web development', 'mobile development'
+        ],
+    },
+    'Data Scientist': {
+        'aliases': 'data science, machine learning engineer, ml engineer',
+        'keywords': [
+            'python', 'r', 'machine learning', 'deep learning', 'statistics', 'sql',
+            'pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch', 'data analysis',
+            'data visualization', 'big data', 'hadoop', 'spark', 'tableau', 'power bi'
+        ],
+    },
+    'Marketing Manager': {
+        'aliases': 'digital marketing manager, marketing executive',
+        'keywords': [
+            'digital marketing', 'seo', 'sem', 'social media', 'content marketing',
+            'email marketing', 'analytics', 'google analytics', 'campaign management',
+            'brand management', 'market research', 'lead generation', 'roi', 'kpi'
+        ],
+    },
+    'Project Manager': {
+        'aliases': 'program manager, project management',
+        'keywords': [
+            'project management', 'agile', 'scrum', 'pmp', 'risk management',
+            'stakeholder management', 'budget management', 'timeline management',
+            'team leadership', 'communication', 'planning', 'execution', 'monitoring'
+        ],
+    },
+}
+
+# Generic keywords apply to every role
+DEFAULT_KEYWORDS = [
+    'experience', 'skills', 'education', 'certification', 'leadership',
+    'teamwork', 'communication', 'problem solving', 'analytical', 'creative'
+]
+
+
+def seed_taxonomy(apps, schema_editor):
+    JobRole = apps.get_model('cv_optimizer', 'JobRole')
+    ATSKeyword = apps.get_model('cv_optimizer', 'ATSKeyword')
+
+    for keyword in DEFAULT_KEYWORDS:
+        ATSKeyword.objects.get_or_create(keyword=keyword, defaults={'category': 'general'})
+
+    for name, data in ROLE_KEYWORDS.items():
+        role, _ = JobRole.objects.get_or_create(name=name, defaults={'aliases': data['aliases']})
+        for keyword in data['keywords']:
+            if keyword in DEFAULT_KEYWORDS:
+                continue
+            ats_keyword, _ = ATSKeyword.objects.get_or_create(keyword=keyword, defaults={'category': 'skill'})
+            ats_keyword.roles.add(role)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_optimizer', '0008_jobrole'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_taxonomy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_optimizer', '0009_seed_keyword_taxonomy'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cvupload',
+            name='job_role',
+            field=models.CharField(blank=True, help_text='Left blank to infer the role from the CV', max_length=200),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:12
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def backfill_role_sequences(apps, schema_editor):
+    # Number each user's CVs per role in upload order, as the old URLs counted them
+    CVUpload = apps.get_model('cv_optimizer', 'CVUpload')
+    last_sequence = {}
+    updated = []
+    for cv in CVUpload.objects.order_by('created_at', 'id').only('id', 'user_id', 'job_role').iterator():
+        cv.role_slug = slugify(cv.job_role) or 'cv'
+        key = (cv.user_id, cv.role_slug)
+        last_sequence[key] = last_sequence.get(key, 0) + 1
+        cv.role_sequence = last_sequence[key]
+        updated.append(cv)
+    CVUpload.objects.bulk_update(updated, ['role_slug', 'role_sequence'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_optimizer', '0010_cvupload_optional_job_role'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cvupload',
+            name='role_sequence',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cvupload',
+            name='role_slug',
+            field=models.SlugField(blank=True, max_length=200),
+        ),
+        migrations.RunPython(backfill_role_sequences, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cvupload',
+            constraint=models.UniqueConstraint(fields=('user', 'role_slug', 'role_sequence'), name='unique_cv_role_sequence'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_optimizer', '0011_cvupload_role_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeywordSynonym',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('keyword', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='synonyms', to='cv_optimizer.atskeyword')),
+                ('role', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='keyword_synonyms', to='cv_optimizer.jobrole')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='keywordsynonym',
+            constraint=models.UniqueConstraint(fields=('keyword', 'term', 'role'), name='unique_keyword_synonym'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:13
+
+from django.db import migrations
+
+
+# Spellings and abbreviations that mean the same as an existing keyword
+SYNONYMS = {
+    'javascript': ['js', 'ecmascript', 'es6'],
+    'node.js': ['nodejs', 'node js'],
+    'react': ['react.js', 'reactjs'],
+    'machine learning': ['ml'],
+    'scikit-learn': ['sklearn', 'scikit learn'],
+    'power bi': ['powerbi'],
+    'api': ['apis'],
+    'full-stack': ['full stack', 'fullstack'],
+    'frontend': ['front-end', 'front end'],
+    'backend': ['back-end', 'back end'],
+    'data visualization': ['data visualisation'],
+    'seo': ['search engine optimization', 'search engine optimisation'],
+    'sem': ['search engine marketing'],
+    'kpi': ['kpis', 'key performance indicators'],
+    'roi': ['return on investment'],
+    'pmp': ['project management professional'],
+    'problem solving': ['problem-solving'],
+    'certification': ['certifications', 'certified'],
+}
+
+# Terms too ambiguous to apply to every role
+ROLE_SYNONYMS = {
+    'Software Developer': {
+        'node.js': ['node'],
+    },
+}
+
+
+def seed_synonyms(apps, schema_editor):
+    ATSKeyword = apps.get_model('cv_optimizer', 'ATSKeyword')
+    JobRole = apps.get_model('cv_optimizer', 'JobRole')
+    KeywordSynonym = apps.get_model('cv_optimizer', 'KeywordSynonym')
+
+    keywords = {keyword.keyword: keyword for keyword in ATSKeyword.objects.filter(keyword__in=SYNONYMS)}
+    for keyword, terms in SYNONYMS.items():
+        if keyword in keywords:
+            for term in terms:
+                KeywordSynonym.objects.get_or_create(keyword=keywords[keyword], term=term, role=None)
+
+    for role_name, role_synonyms in ROLE_SYNONYMS.items():
+        role = JobRole.objects.filter(name=role_name).first()
+        if role is None:
+            continue
+        for keyword, terms in role_synonyms.items():
+            ats_keyword = ATSKeyword.objects.filter(keyword=keyword).first()
+            if ats_keyword is None:
+                continue
+            for term in terms:
+                KeywordSynonym.objects.get_or_create(keyword=ats_keyword, term=term, role=role)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_optimizer', '0012_keywordsynonym'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_synonyms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_optimizer', '0014_llmresponse'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='llmresponse',
+            name='input_tokens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='llmresponse',
+            name='output_tokens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='llmresponse',
+            name='trimmed_tokens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_optimizer', '0015_llmresponse_token_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationGuide',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('company', models.CharField(blank=True, max_length=200)),
+                ('portal', models.CharField(blank=True, max_length=100)),
+                ('guide', models.TextField()),
+                ('view_count', models.PositiveIntegerField(db_index=True, default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('refreshed_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='applicationguide',
+            constraint=models.UniqueConstraint(fields=('title', 'company', 'portal'), name='unique_application_guide'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_optimizer', '0016_applicationguide'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cvupload',
+            name='gemini_analysis_key',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
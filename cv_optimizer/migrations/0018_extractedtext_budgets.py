@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_optimizer', '0017_cvupload_gemini_analysis_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='extractedtext',
+            name='max_chars',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='extractedtext',
+            name='max_pages',
+            field=models.IntegerField(default=0),
+        ),
+    ]
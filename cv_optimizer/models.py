@@ -1,11 +1,29 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Max
 from django.contrib.auth.models import User
 from django.utils.text import slugify
 from accounts.models import CustomUser
 
 class CVUpload(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_EXTRACTING = 'extracting'
+    STATUS_SCORING = 'scoring'
+    STATUS_ANALYZING = 'analyzing'
+    STATUS_OPTIMIZING = 'optimizing'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Queued'),
+        (STATUS_EXTRACTING, 'Extracting text'),
+        (STATUS_SCORING, 'Scoring keywords'),
+        (STATUS_ANALYZING, 'AI analysis'),
+        (STATUS_OPTIMIZING, 'Generating optimized CV'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
-    job_role = models.CharField(max_length=200)
+    job_role = models.CharField(max_length=200, blank=True, help_text='Left blank to infer the role from the CV')
     original_cv = models.FileField(upload_to='cvs/original/')
     optimized_cv = models.FileField(upload_to='cvs/optimized/', blank=True, null=True)
     ats_score = models.FloatField(default=0.0)
@@ -18,38 +36,181 @@ class CVUpload(models.Model):
     job_match_percentage = models.FloatField(default=0.0)
     optimized_content = models.TextField(blank=True)
     
+    # Keyword/structure analysis, recomputed only when its inputs change
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    ats_analysis = models.JSONField(default=dict, blank=True)
+    analysis_key = models.CharField(max_length=64, blank=True)
+    # Model, prompt versions and keyword set the Gemini analysis was built from, so bulk re-analysis can skip current CVs
+    gemini_analysis_key = models.CharField(max_length=64, blank=True)
+    
+    # Background analysis pipeline progress
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    status_message = models.CharField(max_length=255, blank=True)
+    
+    # Position among the user's CVs for the same role, used in analysis URLs
+    role_slug = models.SlugField(max_length=200, blank=True)
+    role_sequence = models.PositiveIntegerField(default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'role_slug', 'role_sequence'], name='unique_cv_role_sequence'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.job_role}"
     
+    def apply_gemini_analysis(self, analysis):
+        """Copy a Gemini analysis dict onto the model fields (without saving)"""
+        self.gemini_analysis = analysis
+        self.ats_score = analysis.get('ats_score', 0)
+        self.missing_sections = analysis.get('missing_sections', [])
+        self.improvement_suggestions = analysis.get('improvements', [])
+        self.keyword_suggestions = analysis.get('keyword_suggestions', [])
+        self.job_match_percentage = analysis.get('job_match_percentage', 0)
+    
+    @property
+    def is_processing(self):
+        return self.status not in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+    
     def get_job_role_slug(self):
-        return slugify(self.job_role)
+        return slugify(self.job_role) or 'cv'
     
     def get_unique_id(self):
-        # Get user's CV count for this specific job role
-        user_cvs = CVUpload.objects.filter(
-            user=self.user, 
-            job_role=self.job_role
-        ).order_by('created_at')
+        return self.role_sequence
+    
+    def save(self, *args, **kwargs):
+        role_slug = self.get_job_role_slug()
+        if role_slug == self.role_slug and self.role_sequence:
+            return super().save(*args, **kwargs)
         
-        for index, cv in enumerate(user_cvs, 1):
-            if cv.id == self.id:
-                return index
-        return 1
+        # New CV, or its role changed: take the next number for this user and role
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'role_slug', 'role_sequence'}
+        with transaction.atomic():
+            # Locking the owner's row makes concurrent uploads by one user take turns. A no-op
+            # UPDATE rather than select_for_update, so SQLite takes its write lock up front and
+            # waits for it instead of failing to upgrade a read lock
+            CustomUser.objects.filter(pk=self.user_id).update(id=F('id'))
+            last = CVUpload.objects.filter(user_id=self.user_id, role_slug=role_slug).aggregate(
+                last=Max('role_sequence')
+            )['last']
+            self.role_slug = role_slug
+            self.role_sequence = (last or 0) + 1
+            super().save(*args, **kwargs)
+
+class ExtractedText(models.Model):
+    """Text extracted from an uploaded CV, keyed by the SHA-256 of the file bytes"""
+    content_hash = models.CharField(max_length=64, unique=True)
+    text = models.TextField()
+    page_count = models.IntegerField(default=0)
+    skipped_pages = models.JSONField(default=list, blank=True)
+    truncated = models.BooleanField(default=False)
+    # CV_PDF_MAX_PAGES / CV_PDF_MAX_CHARS in force when the text was extracted
+    max_pages = models.IntegerField(default=0)
+    max_chars = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.content_hash
+
+class JobRole(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    aliases = models.TextField(blank=True, help_text='Comma-separated alternative job titles, e.g. "software engineer, programmer"')
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def get_aliases(self):
+        return [alias.strip() for alias in self.aliases.split(',') if alias.strip()]
 
 class ATSKeyword(models.Model):
     keyword = models.CharField(max_length=100, unique=True)
     category = models.CharField(max_length=50)
     weight = models.IntegerField(default=1)
+    # Keywords without roles are generic and count towards every role
+    roles = models.ManyToManyField(JobRole, blank=True, related_name='keywords')
 
     def __str__(self):
         return self.keyword
 
+class KeywordSynonym(models.Model):
+    """Alternative spelling or abbreviation that counts as a keyword, e.g. 'js' for 'javascript'"""
+    keyword = models.ForeignKey(ATSKeyword, on_delete=models.CASCADE, related_name='synonyms')
+    term = models.CharField(max_length=100)
+    # Limit an ambiguous term (e.g. "node") to one role; blank applies it everywhere the keyword is used
+    role = models.ForeignKey(JobRole, on_delete=models.CASCADE, null=True, blank=True, related_name='keyword_synonyms')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['keyword', 'term', 'role'], name='unique_keyword_synonym'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.term = self.term.strip().lower()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.term} -> {self.keyword.keyword}"
+
+class TaxonomyVersion(models.Model):
+    """Single row whose token changes whenever keywords, synonyms or roles are edited
+
+    Lets every process notice an edit when the cache is local to each process.
+    """
+    token = models.CharField(max_length=32)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.token
+
+class LLMResponse(models.Model):
+    """Stored model output, keyed by model name, prompt version and a hash of the prompt inputs"""
+    cache_key = models.CharField(max_length=64, unique=True)
+    model_name = models.CharField(max_length=100)
+    prompt_name = models.CharField(max_length=50, db_index=True)
+    prompt_version = models.CharField(max_length=20)
+    response = models.JSONField()
+    hit_count = models.PositiveIntegerField(default=0)
+    # Estimates for the call that produced the response; trimmed_tokens were removed by prompt compaction
+    input_tokens = models.PositiveIntegerField(default=0)
+    output_tokens = models.PositiveIntegerField(default=0)
+    trimmed_tokens = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.prompt_name} v{self.prompt_version} ({self.model_name})"
+
+class ApplicationGuide(models.Model):
+    """AI application guide for a job, shared by every user who views it
+
+    title, company and portal are stored normalized (see guide_cache).
+    """
+    title = models.CharField(max_length=200)
+    company = models.CharField(max_length=200, blank=True)
+    portal = models.CharField(max_length=100, blank=True)
+    guide = models.TextField()
+    view_count = models.PositiveIntegerField(default=0, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    refreshed_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'company', 'portal'], name='unique_application_guide'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} at {self.company}" if self.company else self.title
+
 class CVTemplate(models.Model):
     TEMPLATE_TYPES = [
         ('modern', 'Modern'),
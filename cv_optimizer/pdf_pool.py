@@ -0,0 +1,98 @@
+"""
+Parallel PDF text extraction in a process pool shared across requests.
+
+Worker functions only depend on PyPDF2 so they can be imported by pool
+processes without setting up Django. Daemon processes, such as Celery's
+prefork workers, may not start children; there PoolUnavailable is raised and
+callers extract the pages serially instead.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PyPDF2 import PdfReader
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+class PoolUnavailable(Exception):
+    pass
+
+
+def extract_page_range(file_path, start, end):
+    """Extract pages start..end (1-based, inclusive) inside a pool worker"""
+    results = []
+    with open(file_path, 'rb') as file:
+        reader = PdfReader(file)
+        for number in range(start, end + 1):
+            try:
+                results.append((number, reader.pages[number - 1].extract_text() or ''))
+            except Exception:
+                results.append((number, None))
+    return results
+
+
+def pool_available():
+    """Whether this process may start a pool; daemon processes are not allowed children"""
+    return not multiprocessing.current_process().daemon
+
+
+def get_pool(max_workers=None):
+    """Return the process pool, creating it lazily once per worker process"""
+    global _pool, _pool_pid
+    if not pool_available():
+        raise PoolUnavailable('Daemon processes cannot start a process pool')
+    with _pool_lock:
+        # A pool inherited through fork (e.g. gunicorn --preload) is unusable
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=max_workers)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def shutdown_pool():
+    """Shut the pool down; the next call to get_pool() starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def iter_pdf_pages_parallel(file_path, page_count, pages_per_task=8, max_workers=None, deadline=None):
+    """Yield (page_number, text) in page order while ranges are extracted in the pool
+
+    Raises concurrent.futures.TimeoutError once the monotonic deadline passes,
+    and PoolUnavailable when the pool cannot be started in this process.
+    """
+    futures = []
+    try:
+        pool = get_pool(max_workers)
+        # Worker processes are started here, on the first submit
+        for start in range(1, page_count + 1, pages_per_task):
+            futures.append(pool.submit(extract_page_range, file_path, start, min(start + pages_per_task - 1, page_count)))
+    except (PoolUnavailable, BrokenProcessPool):
+        raise
+    except Exception as e:
+        for future in futures:
+            future.cancel()
+        shutdown_pool()
+        raise PoolUnavailable(f'Could not start the PDF process pool: {e}') from e
+
+    try:
+        for future in futures:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            for item in future.result(timeout=timeout):
+                yield item
+    finally:
+        for future in futures:
+            future.cancel()
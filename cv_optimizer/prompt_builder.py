@@ -0,0 +1,210 @@
+"""
+Compact prompt inputs before they are sent to Gemini.
+
+Extracted CV text carries PDF artifacts, runs of whitespace, and page
+headers repeated on every page. Analysis dicts used to be pasted in as
+their Python repr. Each prompt has a token budget (GEMINI_PROMPT_BUDGETS).
+Its inputs are normalized, deduplicated and, if still too long, trimmed
+section by section, keeping the most useful CV sections first.
+"""
+import json
+import re
+import unicodedata
+
+from django.conf import settings
+
+from .cv_sections import segment_cv
+
+# Roughly four characters per token for English text
+CHARS_PER_TOKEN = 4
+
+DEFAULT_BUDGETS = {
+    'analyze_cv': 2500,
+    'generate_optimized_cv': 3000,
+    'analyze_and_optimize': 2500,
+    'find_matching_jobs': 600,
+    'get_application_guide': 100,
+    'suggest_job_search': 600,
+}
+DEFAULT_BUDGET = 2000
+
+# Most useful first: trimming drops sections from the end of this list
+SECTION_PRIORITY = ['contact', 'summary', 'experience', 'skills', 'projects', 'certifications', 'education']
+
+# Analysis fields in the order the prompts that receive an analysis need them
+ANALYSIS_KEYS = [
+    'ats_score', 'job_match_percentage', 'keyword_suggestions', 'missing_sections',
+    'improvements', 'optimized_sections',
+]
+
+TRIM_MARKER = '[...]'
+BULLET_CHARS = '•●▪■◦➢►▶✓✔·'
+BULLET_PATTERN = re.compile(r'^[ \t]*[' + BULLET_CHARS + r'][ \t]*', re.MULTILINE)
+SPACE_PATTERN = re.compile(r'[ \t ]+')
+BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+CONTROL_PATTERN = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f�]')
+PAGE_NUMBER_PATTERN = re.compile(r'^(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?$', re.IGNORECASE)
+# Shorter repeated lines (a name, a date range) may be real content rather than a page header
+MIN_DEDUP_LENGTH = 20
+
+
+def estimate_tokens(text):
+    """Rough token count for a prompt or response"""
+    return len(text) // CHARS_PER_TOKEN
+
+
+def get_token_budget(prompt_name):
+    budgets = getattr(settings, 'GEMINI_PROMPT_BUDGETS', DEFAULT_BUDGETS)
+    return budgets.get(prompt_name, DEFAULT_BUDGET)
+
+
+def strip_indentation(prompt):
+    """Remove the source-code indentation prompt templates carry on every line"""
+    return '\n'.join(line.strip() for line in prompt.strip().splitlines())
+
+
+def compact_text(text):
+    """Normalize extracted text and drop page numbers and repeated lines"""
+    text = unicodedata.normalize('NFKC', text)
+    text = CONTROL_PATTERN.sub('', text.replace('\r\n', '\n').replace('\r', '\n'))
+    text = BULLET_PATTERN.sub('- ', text)
+
+    lines = []
+    seen = set()
+    for line in text.split('\n'):
+        line = SPACE_PATTERN.sub(' ', line).strip()
+        if PAGE_NUMBER_PATTERN.match(line):
+            continue
+        if len(line) >= MIN_DEDUP_LENGTH:
+            key = line.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    return BLANK_LINES_PATTERN.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def trim_text(text, max_tokens):
+    """Cut text at a line (or word) boundary so it fits max_tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max(max_tokens * CHARS_PER_TOKEN - len(TRIM_MARKER) - 1, 0)
+    cut = text.rfind('\n', 0, limit)
+    if cut < limit // 2:
+        cut = text.rfind(' ', 0, limit)
+    if cut <= 0:
+        cut = limit
+    return text[:cut].rstrip() + '\n' + TRIM_MARKER if cut else ''
+
+
+def compact_cv(cv_text, max_tokens):
+    """Return compacted CV text within max_tokens, dropping lower-priority sections first
+
+    Kept sections stay in their original order.
+    """
+    text = compact_text(cv_text)
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    sections = segment_cv(text)
+
+    def priority(index):
+        name = sections[index]['name']
+        return SECTION_PRIORITY.index(name) if name in SECTION_PRIORITY else len(SECTION_PRIORITY)
+
+    kept = {}
+    remaining = max_tokens
+    for index in sorted(range(len(sections)), key=priority):
+        if remaining <= 0:
+            break
+        section = sections[index]
+        body = text[section['start']:section['end']].strip()
+        if body == section['heading']:
+            # Nothing left under a repeated heading once duplicate lines are gone
+            continue
+        body = trim_text(body, remaining)
+        if body:
+            kept[index] = body
+            remaining -= estimate_tokens(body) + 1
+    return '\n\n'.join(kept[index] for index in sorted(kept))
+
+
+def compact_data(value, max_tokens, keys=None):
+    """Serialize a dict or list as compact JSON within max_tokens
+
+    Empty fields and repeated list items are left out. For dicts, keys (if
+    given) selects and orders the fields; those that no longer fit are dropped.
+    """
+    if isinstance(value, dict):
+        items = [(key, value.get(key)) for key in keys] if keys else list(value.items())
+        result = {}
+        remaining = max_tokens
+        for key, item in items:
+            if item in (None, '', [], {}):
+                continue
+            if isinstance(item, list):
+                item = _unique(item)
+            size = estimate_tokens(_dumps({key: item}))
+            if size > remaining:
+                if isinstance(item, str) and remaining > 10:
+                    result[key] = trim_text(item, remaining - 5)
+                    remaining = 0
+                continue
+            result[key] = item
+            remaining -= size
+        return _dumps(result) if result else ''
+    if isinstance(value, list):
+        value = _unique(value)
+    return trim_text(_dumps(value) if value not in (None, '') else '', max_tokens)
+
+
+def _unique(items):
+    """Drop repeated list items, keeping the first of each"""
+    seen = []
+    for item in items:
+        if item not in seen:
+            seen.append(item)
+    return seen
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+class PromptBuilder:
+    """Compacts the inputs of one prompt within its token budget
+
+    Side inputs (job descriptions, analyses) are capped first; the CV gets
+    what is left. raw_tokens and tokens record the size before and after.
+    """
+
+    def __init__(self, prompt_name, budget=None):
+        self.prompt_name = prompt_name
+        self.budget = budget or get_token_budget(prompt_name)
+        self.remaining = self.budget
+        self.raw_tokens = 0
+        self.tokens = 0
+
+    def _add(self, raw, compacted):
+        self.raw_tokens += estimate_tokens(raw)
+        self.tokens += estimate_tokens(compacted)
+        self.remaining -= estimate_tokens(compacted)
+        return compacted
+
+    def _cap(self, share):
+        return max(int(self.budget * share), 0) if self.remaining > 0 else 0
+
+    def text(self, text, share=0.2):
+        text = text or ''
+        return self._add(text, trim_text(compact_text(text), min(self._cap(share), self.remaining)))
+
+    def data(self, value, share=0.25, keys=None):
+        raw = repr(value) if value else ''
+        return self._add(raw, compact_data(value or {}, min(self._cap(share), self.remaining), keys))
+
+    def cv(self, cv_text):
+        return self._add(cv_text, compact_cv(cv_text, max(self.remaining, 0)))
+
+    @property
+    def saved_tokens(self):
+        return max(self.raw_tokens - self.tokens, 0)
@@ -0,0 +1,65 @@
+"""
+Guess the job role a CV is written for.
+
+Each known role's own keywords form one column of a role x keyword weight
+matrix, built once per taxonomy version. A CV is scanned a single time and
+scored against every role with one matrix product.
+"""
+import numpy as np
+
+from .keyword_matrix import build_scoring_matrices, match_weights
+from .keyword_taxonomy import get_taxonomy
+from .text_normalization import as_normalized
+
+
+def get_role_matrix():
+    """Return the role profile matrix for the current taxonomy, building it on first use"""
+    taxonomy = get_taxonomy()
+    matrix = taxonomy.get('role_matrix')
+    if matrix is None:
+        # Stored on the taxonomy itself, so keyword edits discard it together with the keyword sets
+        roles = sorted(name for name, weights in taxonomy['role_profiles'].items() if weights)
+        profiles = []
+        for name in roles:
+            weights = taxonomy['role_profiles'][name]
+            synonyms = taxonomy['keyword_sets'][name]['synonyms']
+            profiles.append({
+                'keywords': list(weights),
+                'weights': weights,
+                'synonyms': {term: keyword for term, keyword in synonyms.items() if keyword in weights},
+            })
+        matrix = dict(build_scoring_matrices(profiles), roles=roles)
+        taxonomy['role_matrix'] = matrix
+    return matrix
+
+
+def infer_roles(cv_text, limit=None):
+    """Rank known roles for raw or normalized CV text
+
+    Returns [{'role', 'score', 'confidence'}], best first. score is the share
+    of the role's keyword weight found in the CV (0-100) and confidence is the
+    role's share of all role scores (0-1).
+    """
+    matrix = get_role_matrix()
+    if not matrix['roles']:
+        return []
+
+    matched = match_weights([as_normalized(cv_text)], matrix)[0]
+    scores = np.divide(matched, matrix['totals'], out=np.zeros_like(matched), where=matrix['totals'] > 0)
+    total = scores.sum()
+    confidence = scores / total if total else scores
+
+    order = np.argsort(-scores, kind='stable')[:limit]
+    return [
+        {'role': matrix['roles'][index], 'score': round(float(scores[index]) * 100, 2),
+         'confidence': round(float(confidence[index]), 3)}
+        for index in order
+    ]
+
+
+def infer_role(cv_text):
+    """Return the most likely role name, or None when the CV matches no role keywords"""
+    ranked = infer_roles(cv_text, limit=1)
+    if ranked and ranked[0]['score'] > 0:
+        return ranked[0]['role']
+    return None
@@ -0,0 +1,10 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .keyword_taxonomy import invalidate_taxonomy
+from .models import ATSKeyword, JobRole, KeywordSynonym
+
+for model in (ATSKeyword, JobRole, KeywordSynonym):
+    post_save.connect(invalidate_taxonomy, sender=model, dispatch_uid=f'invalidate_taxonomy_save_{model.__name__}')
+    post_delete.connect(invalidate_taxonomy, sender=model, dispatch_uid=f'invalidate_taxonomy_delete_{model.__name__}')
+
+m2m_changed.connect(invalidate_taxonomy, sender=ATSKeyword.roles.through, dispatch_uid='invalidate_taxonomy_roles')
@@ -0,0 +1,145 @@
+import logging
+import threading
+
+from celery import chain, shared_task
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .bulk_reanalysis import get_reanalysis_key
+from .gemini_service import GeminiCVAnalyzer
+from .models import CVUpload
+from .role_inference import infer_role
+from .text_normalization import normalize_document
+from .utils import ensure_ats_analysis, extract_cv_document, extract_text_from_file, is_extraction_error
+
+logger = logging.getLogger(__name__)
+
+
+def run_analysis_pipeline(cv_id):
+    """Queue extract -> score -> AI-analyze -> optimize for an uploaded CV"""
+    CVUpload.objects.filter(pk=cv_id).update(status=CVUpload.STATUS_PENDING, status_message='')
+    chain(
+        extract_cv_text.si(cv_id),
+        score_cv.si(cv_id),
+        ai_analyze_cv.si(cv_id),
+        generate_optimized_content.si(cv_id),
+    ).apply_async()
+
+
+def run_in_background(task, *args):
+    """Queue a task, or run it in a thread when tasks run eagerly, so the request never waits for it
+
+    Without a broker (CELERY_TASK_ALWAYS_EAGER) delay() would run the task
+    inside the current request. The thread starts once the request's
+    transaction commits.
+    """
+    if not task.app.conf.task_always_eager:
+        task.delay(*args)
+        return
+
+    def run():
+        try:
+            task(*args)
+        except Exception:
+            logger.exception('Background %s failed', task.name)
+        finally:
+            connection.close()
+
+    transaction.on_commit(lambda: threading.Thread(target=run, daemon=True).start())
+
+
+def _set_status(cv_id, status, message=''):
+    CVUpload.objects.filter(pk=cv_id).update(status=status, status_message=message[:255], updated_at=timezone.now())
+
+
+def _run_stage(cv_id, status, stage):
+    """Run one pipeline stage, recording progress and failures on the CVUpload"""
+    cv_upload = CVUpload.objects.filter(pk=cv_id).first()
+    if cv_upload is None or cv_upload.status == CVUpload.STATUS_FAILED:
+        # Deleted meanwhile, or an earlier stage failed
+        return
+    
+    _set_status(cv_id, status)
+    try:
+        stage(cv_upload)
+    except Exception as e:
+        logger.exception('CV analysis stage %s failed for CVUpload %s', status, cv_id)
+        _set_status(cv_id, CVUpload.STATUS_FAILED, str(e))
+
+
+@shared_task
+def extract_cv_text(cv_id):
+    def stage(cv_upload):
+        # Warms the content-hash text cache for the following stages
+        document = extract_cv_document(cv_upload.original_cv.path)
+        if is_extraction_error(document['text']):
+            raise ValueError(document['text'])
+        
+        # No target role given on upload: use the role the CV reads most like
+        if not cv_upload.job_role.strip():
+            inferred_role = infer_role(normalize_document(document))
+            if inferred_role:
+                cv_upload.job_role = inferred_role
+                cv_upload.save(update_fields=['job_role', 'updated_at'])
+    _run_stage(cv_id, CVUpload.STATUS_EXTRACTING, stage)
+
+
+@shared_task
+def score_cv(cv_id):
+    _run_stage(cv_id, CVUpload.STATUS_SCORING, ensure_ats_analysis)
+
+
+@shared_task
+def ai_analyze_cv(cv_id):
+    def stage(cv_upload):
+        cv_text = extract_text_from_file(cv_upload.original_cv.path)
+        analyzer = GeminiCVAnalyzer()
+        analysis, optimized_content = analyzer.analyze_and_optimize(cv_text, cv_upload.job_role)
+        cv_upload.apply_gemini_analysis(analysis)
+        cv_upload.optimized_content = optimized_content
+        # Placeholder analyses are left unmarked so the next bulk re-analysis picks them up
+        cv_upload.gemini_analysis_key = '' if analyzer.is_fallback_analysis(analysis) else get_reanalysis_key(
+            analyzer.get_analysis_version(), cv_upload.analysis_key
+        )
+        cv_upload.save(update_fields=[
+            'gemini_analysis', 'ats_score', 'missing_sections', 'improvement_suggestions',
+            'keyword_suggestions', 'job_match_percentage', 'optimized_content', 'gemini_analysis_key', 'updated_at'
+        ])
+    _run_stage(cv_id, CVUpload.STATUS_ANALYZING, stage)
+
+
+@shared_task
+def generate_optimized_content(cv_id):
+    def stage(cv_upload):
+        # Normally written by the combined call in ai_analyze_cv; only generate it if that was skipped
+        if not cv_upload.optimized_content:
+            cv_text = extract_text_from_file(cv_upload.original_cv.path)
+            cv_upload.optimized_content = GeminiCVAnalyzer().generate_optimized_cv(cv_text, cv_upload.gemini_analysis)
+        cv_upload.status = CVUpload.STATUS_COMPLETED
+        cv_upload.status_message = ''
+        cv_upload.save(update_fields=['optimized_content', 'status', 'status_message', 'updated_at'])
+    _run_stage(cv_id, CVUpload.STATUS_OPTIMIZING, stage)
+
+
+@shared_task
+def refresh_application_guide(guide_id):
+    from .guide_cache import refresh_guide
+    refresh_guide(guide_id)
+
+
+@shared_task
+def prewarm_application_guides():
+    """Refresh the most viewed application guides before visitors find them expired"""
+    from .guide_cache import prewarm_guides
+    refreshed = prewarm_guides()
+    logger.info('Refreshed %d application guides', refreshed)
+
+
+@shared_task
+def reanalyze_cvs(cv_ids):
+    """Bulk re-analysis queued from the admin; CVs already current are skipped, so a retried task resumes"""
+    from .bulk_reanalysis import reanalyze, select_outdated
+    selected, current = select_outdated(CVUpload.objects.filter(pk__in=cv_ids))
+    # Celery's prefork workers cannot start a process pool of their own
+    updated, failed = reanalyze(selected, processes=0)
+    logger.info('Re-analyzed %d CVs (%d failed, %d already current)', updated, failed, current)
@@ -0,0 +1,427 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+
+from accounts.models import CustomUser
+
+from . import gemini_service, guide_cache, pdf_pool, text_cache
+from .batch_scoring import score_matrix
+from .circuit_breaker import get_gemini_breaker
+from .gemini_service import GeminiCVAnalyzer
+from .llm_backends import StubError, StubResponse, get_stub_backend
+from .llm_cache import get_response, store_response
+from .llm_gateway import GeminiOverloaded
+from .prompt_builder import PromptBuilder
+from .keyword_taxonomy import get_keyword_set, get_role_keyword_sets, invalidate_taxonomy
+from .models import (
+    ApplicationGuide, ATSKeyword, CVUpload, ExtractedText, JobRole, KeywordSynonym, LLMResponse, TaxonomyVersion,
+)
+from .role_inference import infer_roles
+from .tasks import refresh_application_guide
+from .utils import calculate_ats_score, extract_cv_document, extract_pdf_document, get_analysis_key, iter_docx_lines
+
+
+def write_pdf(path, pages):
+    """Write a minimal PDF with one line of Helvetica text per page"""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_ids = []
+    for text in pages:
+        content = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'
+        objects.append(f'<< /Length {len(content)} >>\nstream\n{content}\nendstream')
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>'
+        )
+        page_ids.append(len(objects))
+    kids = ' '.join(f'{page_id} 0 R' for page_id in page_ids)
+    objects[1] = f'<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>'
+
+    output = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f'{number} 0 obj\n{body}\nendobj\n'.encode('latin-1')
+    xref = len(output)
+    output += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('latin-1')
+    output += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode('latin-1')
+    output += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('latin-1')
+    with open(path, 'wb') as f:
+        f.write(output)
+
+
+def write_docx(path, body):
+    """Write a DOCX holding only word/document.xml with the given body XML"""
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('word/document.xml', (
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{body}</w:body></w:document>'
+        ))
+
+
+def _extract_in_daemon(path, queue):
+    queue.put(extract_pdf_document(path))
+
+
+@override_settings(CV_PDF_PARALLEL_THRESHOLD=4, CV_PDF_PAGES_PER_TASK=2)
+class ParallelPDFExtractionTests(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.pdf')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        write_pdf(self.path, [f'Page {number} text' for number in range(1, 7)])
+
+    def assert_all_pages(self, document):
+        self.assertFalse(document['text'].startswith('Error'), document['text'])
+        self.assertEqual(document['page_count'], 6)
+        for number in range(1, 7):
+            self.assertIn(f'Page {number} text', document['text'])
+
+    def test_daemon_process_extracts_serially(self):
+        # Celery prefork workers are daemon processes, which may not start a pool of their own
+        queue = multiprocessing.Queue()
+        worker = multiprocessing.Process(target=_extract_in_daemon, args=(self.path, queue), daemon=True)
+        worker.start()
+        document = queue.get(timeout=30)
+        worker.join(timeout=30)
+        self.assert_all_pages(document)
+
+    def test_pool_start_failure_falls_back_to_serial(self):
+        with mock.patch.object(pdf_pool, 'ProcessPoolExecutor', side_effect=OSError('no more processes')):
+            document = extract_pdf_document(self.path)
+        self.assert_all_pages(document)
+
+
+class ExtractionCacheTests(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.pdf')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        write_pdf(self.path, [f'Page {number} text' for number in range(1, 7)])
+        text_cache._text_cache.clear()
+        self.addCleanup(text_cache._text_cache.clear)
+
+    def test_larger_page_budget_re_extracts_truncated_document(self):
+        with override_settings(CV_PDF_MAX_PAGES=2):
+            self.assertEqual(extract_cv_document(self.path)['skipped_pages'], [3, 4, 5, 6])
+        # Also when the truncated document comes from the database rather than this process
+        text_cache._text_cache.clear()
+        with override_settings(CV_PDF_MAX_PAGES=50):
+            document = extract_cv_document(self.path)
+        self.assertEqual((document['skipped_pages'], document['truncated']), ([], False))
+        self.assertIn('Page 6 text', document['text'])
+        self.assertFalse(ExtractedText.objects.get(content_hash=document['content_hash']).truncated)
+
+    def test_smaller_budget_reuses_truncated_document(self):
+        with override_settings(CV_PDF_MAX_PAGES=3):
+            extract_cv_document(self.path)
+        with override_settings(CV_PDF_MAX_PAGES=2), \
+                mock.patch('cv_optimizer.utils._extract_document_uncached') as extract:
+            self.assertEqual(extract_cv_document(self.path)['skipped_pages'], [4, 5, 6])
+        extract.assert_not_called()
+
+
+class DocxExtractionTests(TestCase):
+    def test_tab_stop_definitions_are_not_text(self):
+        handle, path = tempfile.mkstemp(suffix='.docx')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        write_docx(path, (
+            '<w:p><w:pPr><w:tabs><w:tab w:val="right" w:pos="9000"/></w:tabs></w:pPr>'
+            '<w:r><w:t>Name</w:t></w:r><w:r><w:tab/><w:t>Right</w:t></w:r></w:p>'
+        ))
+        self.assertEqual(list(iter_docx_lines(path)), ['Name\tRight'])
+
+
+class RoleScopedSynonymTests(TestCase):
+    def setUp(self):
+        invalidate_taxonomy()
+        self.devops = JobRole.objects.create(name='Test DevOps Engineer')
+        self.backend = JobRole.objects.create(name='Test Backend Engineer')
+        kubernetes = ATSKeyword.objects.create(keyword='kubernetes', category='tools', weight=3)
+        kubernetes.roles.add(self.devops, self.backend)
+        ATSKeyword.objects.create(keyword='golang', category='languages', weight=2).roles.add(self.backend)
+        # "k8s" only counts as kubernetes for the DevOps role
+        KeywordSynonym.objects.create(keyword=kubernetes, term='k8s', role=self.devops)
+        self.cv_text = 'Ran production workloads on k8s and wrote services in golang.'
+
+    def test_batch_scores_match_single_cv_scores(self):
+        keyword_sets = get_role_keyword_sets()
+        scores = score_matrix([self.cv_text], keyword_sets)[0]
+        for column, keyword_set in enumerate(keyword_sets):
+            expected = calculate_ats_score(
+                self.cv_text, keyword_set['keywords'], keyword_set['weights'], keyword_set['synonyms']
+            )['score']
+            self.assertAlmostEqual(scores[column], expected, places=2, msg=keyword_set['role'])
+
+    def test_synonym_only_counts_for_its_role(self):
+        backend = get_keyword_set(self.backend.name)
+        result = calculate_ats_score(self.cv_text, backend['keywords'], backend['weights'], backend['synonyms'])
+        self.assertNotIn('kubernetes', result['matched_keywords'])
+
+        ranked = {entry['role']: entry['score'] for entry in infer_roles(self.cv_text)}
+        # Backend profile: golang found (2 of 5); DevOps profile: kubernetes through k8s (3 of 3)
+        self.assertEqual(ranked[self.backend.name], 40.0)
+        self.assertEqual(ranked[self.devops.name], 100.0)
+
+
+class KeywordMatchingTests(TestCase):
+    def test_multi_word_keywords_match_across_whitespace(self):
+        result = calculate_ats_score('Dashboards in Power  BI.\nApplied machine\nlearning to churn.',
+                                     ['power bi', 'machine learning'])
+        self.assertEqual(result['matched_keywords'], ['power bi', 'machine learning'])
+
+    def test_batch_scores_match_across_whitespace(self):
+        keyword_set = {'keywords': ['machine learning'], 'weights': {'machine learning': 2}, 'synonyms': {}}
+        self.assertEqual(score_matrix(['Machine\n\tlearning'], [keyword_set])[0][0], 100.0)
+
+
+class TaxonomyInvalidationTests(TestCase):
+    def test_edit_in_another_process_reloads_keywords(self):
+        role = JobRole.objects.create(name='Test Florist')
+        self.assertNotIn('ikebana', get_keyword_set(role.name)['keywords'])
+
+        # Rows written by another process: no signal fires in this one
+        keyword = ATSKeyword.objects.bulk_create([ATSKeyword(keyword='ikebana', category='skills')])[0]
+        ATSKeyword.roles.through.objects.bulk_create([ATSKeyword.roles.through(atskeyword=keyword, jobrole=role)])
+        self.assertNotIn('ikebana', get_keyword_set(role.name)['keywords'])
+
+        # ...followed by that process's invalidate_taxonomy
+        TaxonomyVersion.objects.update(token='edited-elsewhere')
+        self.assertIn('ikebana', get_keyword_set(role.name)['keywords'])
+
+
+class AnalysisKeyTests(TestCase):
+    def setUp(self):
+        invalidate_taxonomy()
+        self.role = JobRole.objects.create(name='Test Pastry Chef')
+        ATSKeyword.objects.create(keyword='lamination', category='skills', weight=2).roles.add(self.role)
+
+    def test_unknown_role_key_survives_a_cache_reset(self):
+        # Free-text titles depend on every role; the key must not change with the process or cache
+        before = get_analysis_key('cvs/original/a.pdf', 'Dog Walker')
+        cache.clear()
+        invalidate_taxonomy()
+        self.assertEqual(get_analysis_key('cvs/original/a.pdf', 'Dog Walker'), before)
+
+        ATSKeyword.objects.create(keyword='tempering', category='skills', weight=1).roles.add(self.role)
+        self.assertNotEqual(get_analysis_key('cvs/original/a.pdf', 'Dog Walker'), before)
+
+
+@override_settings(LLM_BACKEND='stub', LLM_STUB={'latency': 0.01, 'jitter': 0}, GEMINI_DEADLINES={'analyze_cv': 0.6},
+                   GEMINI_SLOW_CALL_SHARE=0.75, GEMINI_BREAKER_FAILURES=3)
+class RateLimitedBreakerTests(TestCase):
+    def setUp(self):
+        get_gemini_breaker().reset()
+        self.addCleanup(get_gemini_breaker().reset)
+
+    def test_queue_wait_is_not_a_slow_call(self):
+        def slow_queue(max_wait=None):
+            time.sleep(0.5)
+            return 0.5
+
+        stub = get_stub_backend()
+        with mock.patch.object(gemini_service, 'acquire', side_effect=slow_queue), \
+                mock.patch.object(stub, 'generate', wraps=stub.generate) as generate:
+            for _ in range(4):
+                GeminiCVAnalyzer().generate('prompt', PromptBuilder('analyze_cv'))
+
+        # Waiting 0.5s of a 0.6s deadline used to count as slow and open the breaker
+        self.assertEqual(get_gemini_breaker().get_state()['state'], 'closed')
+        # The API call only gets what the queue left of the deadline
+        self.assertAlmostEqual(generate.call_args.kwargs['timeout'], 0.1)
+
+    def test_shed_calls_do_not_count_as_failures(self):
+        with mock.patch.object(gemini_service, 'acquire', side_effect=GeminiOverloaded('full')):
+            for _ in range(4):
+                with self.assertRaises(GeminiOverloaded):
+                    GeminiCVAnalyzer().generate('prompt', PromptBuilder('analyze_cv'))
+        state = get_gemini_breaker().get_state()
+        self.assertEqual((state['state'], state['failures']), ('closed', 0))
+
+
+@override_settings(LLM_BACKEND='stub', GEMINI_RATE_LIMIT=0)
+class NonObjectReplyTests(TestCase):
+    def setUp(self):
+        get_gemini_breaker().reset()
+        self.addCleanup(get_gemini_breaker().reset)
+        self.analyzer = GeminiCVAnalyzer()
+
+    def test_list_reply_falls_back_and_is_not_cached(self):
+        with mock.patch.object(self.analyzer, 'generate', return_value='["Python"]'):
+            analysis, _ = self.analyzer.analyze_and_optimize('Python developer', 'Data Analyst')
+            self.assertEqual(analysis, self.analyzer._get_fallback_analysis())
+            self.assertEqual(self.analyzer.analyze_cv('Python developer'), self.analyzer._get_fallback_analysis())
+            self.assertEqual(self.analyzer.find_matching_jobs({'skills': ['python']}),
+                             self.analyzer._parse_job_response(''))
+            self.assertEqual(self.analyzer.suggest_job_search('Data Analyst'),
+                             self.analyzer._get_fallback_job_search('Data Analyst', ''))
+        self.assertFalse(LLMResponse.objects.exists())
+
+        # The next good reply is used rather than the bad one being replayed from the cache
+        reply = '{"ats_score": 80, "optimized_cv": "Rewritten CV"}'
+        with mock.patch.object(self.analyzer, 'generate', return_value=reply):
+            analysis, optimized_cv = self.analyzer.analyze_and_optimize('Python developer', 'Data Analyst')
+        self.assertEqual((analysis, optimized_cv), ({'ats_score': 80}, 'Rewritten CV'))
+
+
+@override_settings(LLM_BACKEND='stub', LLM_STUB={'latency': 0.01, 'jitter': 0, 'chunk_delay': 0},
+                   GEMINI_RATE_LIMIT=0, GEMINI_BREAKER_FAILURES=1)
+class StreamOptimizedCVTests(TestCase):
+    SAVED = 'Saved optimized CV'
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        get_gemini_breaker().reset()
+        self.addCleanup(get_gemini_breaker().reset)
+
+        user = CustomUser.objects.create_user(username='streamer', email='streamer@example.com', password='x')
+        self.client.force_login(user)
+        pdf_path = os.path.join(media_root, 'cv.pdf')
+        write_pdf(pdf_path, ['Python developer with Django experience'])
+        self.cv_upload = CVUpload(user=user, job_role='Software Developer', status=CVUpload.STATUS_COMPLETED,
+                                  optimized_content=self.SAVED)
+        with open(pdf_path, 'rb') as f:
+            self.cv_upload.original_cv.save('cv.pdf', ContentFile(f.read()), save=False)
+        self.cv_upload.save()
+
+    def stream(self):
+        response = self.client.get(reverse('cv_optimizer:stream_optimized', args=[self.cv_upload.id]),
+                                   {'force_refresh': '1'})
+        body = b''.join(response.streaming_content).decode()
+        self.cv_upload.refresh_from_db()
+        return body
+
+    def test_complete_stream_is_saved(self):
+        body = self.stream()
+        self.assertIn('event: done', body)
+        self.assertNotEqual(self.cv_upload.optimized_content, self.SAVED)
+        self.assertTrue(self.cv_upload.optimized_content)
+
+    def test_open_breaker_keeps_saved_cv(self):
+        get_gemini_breaker().record_failure('test')
+        body = self.stream()
+        self.assertIn('event: error', body)
+        self.assertNotIn('event: chunk', body)
+        self.assertEqual(self.cv_upload.optimized_content, self.SAVED)
+
+    def test_broken_stream_keeps_saved_cv(self):
+        def broken_stream(prompt, timeout=None, **kwargs):
+            yield StubResponse('PROFESSIONAL SUMMARY\n')
+            raise StubError('connection reset')
+
+        with mock.patch.object(get_stub_backend(), 'stream', side_effect=broken_stream):
+            body = self.stream()
+        self.assertIn('event: chunk', body)
+        self.assertIn('event: error', body)
+        self.assertNotIn('event: done', body)
+        self.assertEqual(self.cv_upload.optimized_content, self.SAVED)
+
+
+class ConcurrentUploadTests(TransactionTestCase):
+    def test_concurrent_uploads_get_distinct_sequence_numbers(self):
+        user = CustomUser.objects.create_user(username='uploader', email='uploader@example.com', password='x')
+        uploads = 4
+        barrier = threading.Barrier(uploads)
+        errors = []
+
+        def upload(index):
+            try:
+                barrier.wait()
+                CVUpload.objects.create(user=user, job_role='Data Analyst', original_cv=f'cvs/original/cv{index}.pdf')
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=upload, args=(index,)) for index in range(uploads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        sequences = sorted(CVUpload.objects.filter(user=user).values_list('role_sequence', flat=True))
+        self.assertEqual(sequences, list(range(1, uploads + 1)))
+
+
+class StoreResponseTests(TestCase):
+    def test_storing_a_key_twice_keeps_the_newest_response(self):
+        store_response('key', 'stub', 'analyze_cv', {'answer': 1}, {'input_tokens': 10})
+        store_response('key', 'stub', 'analyze_cv', {'answer': 2}, {'input_tokens': 20})
+        self.assertEqual(LLMResponse.objects.filter(cache_key='key').count(), 1)
+        self.assertEqual(LLMResponse.objects.get(cache_key='key').input_tokens, 20)
+        self.assertEqual(get_response('key'), {'answer': 2})
+
+
+class ConcurrentStoreResponseTests(TransactionTestCase):
+    def test_concurrent_stores_are_all_cached(self):
+        writers = 4
+        barrier = threading.Barrier(writers)
+        errors = []
+
+        def store(index):
+            try:
+                barrier.wait()
+                store_response(f'key{index % 2}', 'stub', 'analyze_cv', {'answer': index})
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=store, args=(index,)) for index in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(LLMResponse.objects.values_list('cache_key', flat=True)), ['key0', 'key1'])
+
+
+@skipUnless(refresh_application_guide.app.conf.task_always_eager, 'needs eager tasks, the default without a broker')
+class StaleGuideTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ApplicationGuide.objects.create(title='data analyst', guide='Stale guide', expires_at=timezone.now())
+
+    def test_expired_guide_is_served_while_a_thread_refreshes_it(self):
+        with mock.patch.object(guide_cache, '_generate') as generate, \
+                mock.patch('cv_optimizer.tasks.threading.Thread') as thread, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(guide_cache.get_guide('Data Analyst'), 'Stale guide')
+        # Eager Celery used to regenerate the guide inside the visitor's request
+        generate.assert_not_called()
+        thread.return_value.start.assert_called_once()
+
+
+@skipUnless(refresh_application_guide.app.conf.task_always_eager, 'needs eager tasks, the default without a broker')
+class ReanalyzeAdminActionTests(TestCase):
+    def test_action_returns_before_the_re_analysis_runs(self):
+        admin_user = CustomUser.objects.create_superuser(username='admin', email='admin@example.com', password='x')
+        cv_upload = CVUpload.objects.create(user=admin_user, job_role='Data Analyst', original_cv='cvs/original/cv.pdf')
+        self.client.force_login(admin_user)
+
+        with mock.patch('cv_optimizer.bulk_reanalysis.reanalyze') as reanalyze, \
+                mock.patch('cv_optimizer.tasks.threading.Thread') as thread, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('admin:cv_optimizer_cvupload_changelist'),
+                                        {'action': 'reanalyze', '_selected_action': [cv_upload.pk]})
+        self.assertEqual(response.status_code, 302)
+        reanalyze.assert_not_called()
+        thread.return_value.start.assert_called_once()
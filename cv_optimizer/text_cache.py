@@ -0,0 +1,79 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import ExtractedText
+
+
+class LRUCache:
+    """Small thread-safe in-process LRU cache"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_text_cache = LRUCache(getattr(settings, 'CV_TEXT_CACHE_SIZE', 128))
+
+
+def hash_file(file_path, chunk_size=64 * 1024):
+    """Return the SHA-256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+DOCUMENT_FIELDS = ('text', 'page_count', 'skipped_pages', 'truncated', 'max_pages', 'max_chars')
+
+
+def get_cached_document(content_hash):
+    """Look up an extracted document in the in-process LRU, then the database"""
+    document = _text_cache.get(content_hash)
+    if document is not None:
+        return document
+
+    document = ExtractedText.objects.filter(content_hash=content_hash).values(*DOCUMENT_FIELDS).first()
+    if document is not None:
+        _text_cache.set(content_hash, document)
+    return document
+
+
+def store_document(content_hash, document):
+    """Persist an extracted document for a content hash and keep it in the LRU"""
+    defaults = {field: document[field] for field in DOCUMENT_FIELDS}
+    try:
+        with transaction.atomic():
+            ExtractedText.objects.create(content_hash=content_hash, **defaults)
+    except IntegrityError:
+        # Stored before, e.g. cut at smaller budgets, or by another worker meanwhile
+        ExtractedText.objects.filter(content_hash=content_hash).update(**defaults)
+    _text_cache.set(content_hash, defaults)
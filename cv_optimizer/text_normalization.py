@@ -0,0 +1,39 @@
+from django.conf import settings
+
+from .text_cache import LRUCache
+
+_normalized_cache = LRUCache(getattr(settings, 'CV_TEXT_CACHE_SIZE', 128))
+
+
+def normalize_text(text):
+    """Lowercase a CV once so every analyzer can share the result
+
+    'words' is the lowercased text with each run of whitespace collapsed to a
+    single space, so multi-word keywords such as "power bi" still match when
+    the CV breaks them across lines or pads them with extra spaces.
+    """
+    words = text.lower().split()
+    return {
+        'text': text,
+        'words': ' '.join(words),
+        'word_count': len(words),
+    }
+
+
+def normalize_document(document):
+    """Normalize an extracted document, cached by its content hash next to the text cache"""
+    content_hash = document.get('content_hash')
+    if content_hash:
+        normalized = _normalized_cache.get(content_hash)
+        if normalized is not None:
+            return normalized
+
+    normalized = normalize_text(document['text'])
+    if content_hash:
+        _normalized_cache.set(content_hash, normalized)
+    return normalized
+
+
+def as_normalized(cv_text):
+    """Accept either raw CV text or an already normalized document"""
+    return normalize_text(cv_text) if isinstance(cv_text, str) else cv_text
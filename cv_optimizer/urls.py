@@ -6,6 +6,9 @@ app_name = 'cv_optimizer'
 urlpatterns = [
     path('upload/', views.CVUploadView.as_view(), name='upload'),
     path('analyze/<slug:job_role>/<int:cv_id>/', views.CVAnalysisView.as_view(), name='analyze'),
+    path('status/<int:cv_id>/', views.CVStatusView.as_view(), name='cv_status'),
+    path('infer-role/', views.InferRoleView.as_view(), name='infer_role'),
+    path('batch-score/', views.BatchScoreView.as_view(), name='batch_score'),
     path('optimize/<int:cv_id>/', views.CVOptimizeView.as_view(), name='optimize'),
     path('download/<int:cv_id>/', views.DownloadOptimizedCV.as_view(), name='download'),
     path('delete/<int:cv_id>/', views.DeleteCVView.as_view(), name='delete'),
@@ -15,6 +18,7 @@ urlpatterns = [
     # AI-Powered Features
     path('ai-optimized/<int:cv_id>/', ai_views.AIOptimizedCVView.as_view(), name='ai_optimized'),
     path('ai-download/<int:cv_id>/', ai_views.DownloadOptimizedAICVView.as_view(), name='ai_download'),
+    path('ai-optimized/<int:cv_id>/stream/', ai_views.StreamOptimizedCVView.as_view(), name='stream_optimized'),
     path('job-matching/<int:cv_id>/', ai_views.JobMatchingView.as_view(), name='job_matching'),
     path('application-guide/', ai_views.JobApplicationGuideView.as_view(), name='application_guide'),
     path('regenerate-analysis/<int:cv_id>/', ai_views.RegenerateAnalysisView.as_view(), name='regenerate_analysis'),
@@ -1,135 +1,255 @@
 import os
-import re
-import nltk
+import time
+import hashlib
+import zipfile
 from collections import Counter
+from xml.etree import ElementTree
 from PyPDF2 import PdfReader
-from docx import Document
 import json
 import html
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from .cv_sections import segment_cv, find_email, find_phone
+from .analysis_cache import memoize
+from .keyword_matcher import get_keyword_matcher
+from .keyword_taxonomy import get_keyword_set, get_taxonomy, normalize_role
+from .pdf_pool import PoolUnavailable, iter_pdf_pages_parallel, pool_available, shutdown_pool
+from .role_inference import infer_role
+from .text_cache import hash_file, get_cached_document, store_document
+from .text_normalization import as_normalized, normalize_document
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
-
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+def iter_pdf_pages(reader, start=1):
+    """Yield (page_number, text) one page at a time; text is None for unreadable pages"""
+    for number in range(start, len(reader.pages) + 1):
+        try:
+            yield number, reader.pages[number - 1].extract_text() or ''
+        except Exception:
+            yield number, None
 
-def extract_text_from_pdf(file_path):
-    """Extract text from PDF file"""
+def extract_pdf_document(file_path, max_pages=None, max_chars=None, time_budget=None):
+    """Extract PDF text page by page, stopping early once a page, character or time budget is hit"""
+    max_pages = max_pages or settings.CV_PDF_MAX_PAGES
+    max_chars = max_chars or settings.CV_PDF_MAX_CHARS
+    time_budget = time_budget or settings.CV_PDF_TIME_BUDGET
+    
+    document = {'text': '', 'page_count': 0, 'skipped_pages': [], 'truncated': False, 'timed_out': False}
+    parts = []
+    char_count = 0
+    started = time.monotonic()
+    
     try:
         with open(file_path, 'rb') as file:
             reader = PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text()
-        return text
+            page_count = len(reader.pages)
+            document['page_count'] = page_count
+            
+            # Large PDFs are split into page ranges and extracted in the shared process pool,
+            # unless this is a daemon process (e.g. a Celery prefork worker) that may not start one
+            pages_to_read = min(page_count, max_pages)
+            if pages_to_read >= settings.CV_PDF_PARALLEL_THRESHOLD and pool_available():
+                page_iter = iter_pdf_pages_parallel(
+                    file_path, pages_to_read,
+                    pages_per_task=settings.CV_PDF_PAGES_PER_TASK,
+                    max_workers=settings.CV_PDF_POOL_WORKERS,
+                    deadline=started + time_budget
+                )
+            else:
+                page_iter = iter_pdf_pages(reader)
+            
+            last_number = 0
+            while True:
+                try:
+                    number, page_text = next(page_iter)
+                except StopIteration:
+                    break
+                except FuturesTimeoutError:
+                    document['skipped_pages'].extend(range(last_number + 1, page_count + 1))
+                    document['truncated'] = True
+                    document['timed_out'] = True
+                    break
+                except (BrokenProcessPool, PoolUnavailable):
+                    # A pool worker died or the pool could not start; finish the remaining pages in this process
+                    shutdown_pool()
+                    page_iter = iter_pdf_pages(reader, start=last_number + 1)
+                    continue
+                last_number = number
+                
+                if page_text is None:
+                    document['skipped_pages'].append(number)
+                    continue
+                
+                if char_count + len(page_text) > max_chars:
+                    page_text = page_text[:max_chars - char_count]
+                    document['truncated'] = True
+                parts.append(page_text)
+                char_count += len(page_text)
+                
+                out_of_time = time.monotonic() - started > time_budget
+                if number < page_count and (number >= max_pages or char_count >= max_chars or out_of_time):
+                    # Everything after this page is left unread
+                    document['skipped_pages'].extend(range(number + 1, page_count + 1))
+                    document['truncated'] = True
+                    document['timed_out'] = out_of_time
+                    page_iter.close()
+                    break
     except Exception as e:
-        return f"Error reading PDF: {str(e)}"
+        document['text'] = f"Error reading PDF: {str(e)}"
+        return document
+    
+    document['text'] = '\n'.join(parts)
+    return document
+
+def extract_text_from_pdf(file_path):
+    """Extract text from PDF file"""
+    return extract_pdf_document(file_path)['text']
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+def iter_docx_lines(file_path):
+    """Yield paragraph and table-row text from a DOCX in document order without building a DOM"""
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open('word/document.xml') as xml_file:
+            body = None
+            runs = []
+            cell_stack = []  # paragraph texts of the open table cells
+            row_stack = []   # cell texts of the open table rows
+            run_depth = 0    # w:tab is a tab character only inside a run, not a tab-stop definition
+            
+            for event, elem in ElementTree.iterparse(xml_file, events=('start', 'end')):
+                tag = elem.tag
+                if event == 'start':
+                    if tag == WORD_NS + 'body':
+                        body = elem
+                    elif tag == WORD_NS + 'r':
+                        run_depth += 1
+                    elif tag == WORD_NS + 'tr':
+                        row_stack.append([])
+                    elif tag == WORD_NS + 'tc':
+                        cell_stack.append([])
+                    continue
+                
+                if tag == WORD_NS + 't':
+                    runs.append(elem.text or '')
+                elif tag == WORD_NS + 'r':
+                    run_depth -= 1
+                elif tag == WORD_NS + 'tab':
+                    if run_depth:
+                        runs.append('\t')
+                elif tag in (WORD_NS + 'br', WORD_NS + 'cr'):
+                    runs.append('\n')
+                elif tag == WORD_NS + 'p':
+                    text = ''.join(runs)
+                    runs.clear()
+                    if cell_stack:
+                        cell_stack[-1].append(text)
+                    else:
+                        yield text
+                elif tag == WORD_NS + 'tc':
+                    cell = cell_stack.pop()
+                    row_stack[-1].append(' '.join(text for text in cell if text.strip()))
+                elif tag == WORD_NS + 'tr':
+                    line = ' | '.join(text for text in row_stack.pop() if text)
+                    if cell_stack:
+                        cell_stack[-1].append(line)
+                    else:
+                        yield line
+                
+                # Drop finished top-level blocks so memory stays flat
+                if body is not None and not cell_stack and tag in (WORD_NS + 'p', WORD_NS + 'tbl'):
+                    body.clear()
 
 def extract_text_from_docx(file_path):
-    """Extract text from DOCX file"""
+    """Extract text from DOCX file, including table cells"""
     try:
-        doc = Document(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text
+        return ''.join(line + "\n" for line in iter_docx_lines(file_path))
     except Exception as e:
         return f"Error reading DOCX: {str(e)}"
 
+def extract_cv_document(file_path):
+    """Extract text and extraction metadata, reusing cached results for identical files"""
+    try:
+        content_hash = hash_file(file_path)
+    except OSError:
+        return _extract_document_uncached(file_path)
+    
+    max_pages, max_chars = settings.CV_PDF_MAX_PAGES, settings.CV_PDF_MAX_CHARS
+    document = get_cached_document(content_hash)
+    # A document cut short is only reused while the budgets are no larger than when it was cut
+    if document is None or (document['truncated'] and (document['max_pages'] < max_pages
+                                                        or document['max_chars'] < max_chars)):
+        document = _extract_document_uncached(file_path)
+        # Time-budget cut-offs depend on server load, so only cache deterministic results
+        if not is_extraction_error(document['text']) and not document.get('timed_out'):
+            document = dict(document, max_pages=max_pages, max_chars=max_chars)
+            store_document(content_hash, document)
+    return dict(document, content_hash=content_hash)
+
 def extract_text_from_file(file_path):
+    """Extract text from various file formats, reusing cached text for identical files"""
+    return extract_cv_document(file_path)['text']
+
+def is_extraction_error(text):
+    """Check whether extracted text is an error message rather than CV content"""
+    return text.startswith("Error") or text == "Unsupported file format"
+
+def _extract_document_uncached(file_path):
     """Extract text from various file formats"""
     file_extension = os.path.splitext(file_path)[1].lower()
     
     if file_extension == '.pdf':
-        return extract_text_from_pdf(file_path)
+        return extract_pdf_document(file_path)
     elif file_extension in ['.docx', '.doc']:
-        return extract_text_from_docx(file_path)
+        text = extract_text_from_docx(file_path)
     else:
-        return "Unsupported file format"
+        text = "Unsupported file format"
+    return {'text': text, 'page_count': 0, 'skipped_pages': [], 'truncated': False}
 
 def get_job_keywords(job_role):
     """Get relevant keywords for a job role"""
-    job_keywords = {
-        'software developer': [
-            'python', 'java', 'javascript', 'react', 'node.js', 'sql', 'git', 'agile',
-            'api', 'database', 'frontend', 'backend', 'full-stack', 'programming',
-            'software development', 'web development', 'mobile development'
-        ],
-        'data scientist': [
-            'python', 'r', 'machine learning', 'deep learning', 'statistics', 'sql',
-            'pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch', 'data analysis',
-            'data visualization', 'big data', 'hadoop', 'spark', 'tableau', 'power bi'
-        ],
-        'marketing manager': [
-            'digital marketing', 'seo', 'sem', 'social media', 'content marketing',
-            'email marketing', 'analytics', 'google analytics', 'campaign management',
-            'brand management', 'market research', 'lead generation', 'roi', 'kpi'
-        ],
-        'project manager': [
-            'project management', 'agile', 'scrum', 'pmp', 'risk management',
-            'stakeholder management', 'budget management', 'timeline management',
-            'team leadership', 'communication', 'planning', 'execution', 'monitoring'
-        ]
-    }
-    
-    # Default keywords for any job
-    default_keywords = [
-        'experience', 'skills', 'education', 'certification', 'leadership',
-        'teamwork', 'communication', 'problem solving', 'analytical', 'creative'
-    ]
-    
-    job_role_lower = job_role.lower()
-    for role, keywords in job_keywords.items():
-        if role in job_role_lower:
-            return keywords + default_keywords
-    
-    return default_keywords
+    return get_keyword_set(job_role)['keywords']
 
-def calculate_ats_score(cv_text, job_keywords):
-    """Calculate ATS score based on keyword matching"""
-    cv_text_lower = cv_text.lower()
+def calculate_ats_score(cv_text, job_keywords, weights=None, synonyms=None):
+    """Calculate ATS score based on weighted keyword matching"""
+    normalized = as_normalized(cv_text)
     
-    # Remove stopwords
-    stop_words = set(stopwords.words('english'))
-    cv_words = [word for word in word_tokenize(cv_text_lower) if word.isalnum() and word not in stop_words]
+    # Find every keyword, or one of its synonyms, in one pass over the text; positions are offsets into normalized['words']
+    keyword_positions = get_keyword_matcher(job_keywords, synonyms).find(normalized['words'], lowered=True)
+    matched_keywords = [kw for kw in job_keywords if kw.lower() in keyword_positions]
+    missing_keywords = [kw for kw in job_keywords if kw.lower() not in keyword_positions]
     
-    # Count keyword matches
-    keyword_matches = 0
-    matched_keywords = []
-    
-    for keyword in job_keywords:
-        if keyword.lower() in cv_text_lower:
-            keyword_matches += 1
-            matched_keywords.append(keyword)
-    
-    # Calculate score (0-100)
-    score = min((keyword_matches / len(job_keywords)) * 100, 100)
+    # Calculate score (0-100) as the share of keyword weight found in the CV
+    weights = weights or {}
+    total_weight = sum(weights.get(kw, 1) for kw in job_keywords)
+    matched_weight = sum(weights.get(kw, 1) for kw in matched_keywords)
+    score = min((matched_weight / total_weight) * 100, 100) if total_weight else 0
     
     return {
         'score': round(score, 2),
         'matched_keywords': matched_keywords,
         'total_keywords': len(job_keywords),
-        'missing_keywords': [kw for kw in job_keywords if kw.lower() not in cv_text_lower]
+        'missing_keywords': missing_keywords,
+        'keyword_counts': {kw: len(keyword_positions[kw.lower()]) for kw in matched_keywords},
+        'keyword_positions': {kw: keyword_positions[kw.lower()] for kw in matched_keywords}
     }
 
 def analyze_cv_structure(cv_text):
     """Analyze CV structure and format"""
+    normalized = as_normalized(cv_text)
+    cv_text = normalized['text']
+    
+    sections = segment_cv(cv_text)
+    section_names = {section['name'] for section in sections}
+    
     analysis = {
-        'has_contact_info': bool(re.search(r'[\w\.-]+@[\w\.-]+\.\w+', cv_text)),
-        'has_phone': bool(re.search(r'[\+]?[1-9]?[0-9]{7,14}', cv_text)),
-        'has_experience_section': any(word in cv_text.lower() for word in ['experience', 'work history', 'employment']),
-        'has_education_section': any(word in cv_text.lower() for word in ['education', 'qualification', 'degree']),
-        'has_skills_section': any(word in cv_text.lower() for word in ['skills', 'technical skills', 'competencies']),
-        'word_count': len(cv_text.split()),
-        'has_bullet_points': '•' in cv_text or '*' in cv_text or '-' in cv_text
+        'has_contact_info': find_email(cv_text) is not None,
+        'has_phone': find_phone(cv_text) is not None,
+        'has_experience_section': 'experience' in section_names,
+        'has_education_section': 'education' in section_names,
+        'has_skills_section': 'skills' in section_names,
+        'word_count': normalized['word_count'],
+        'has_bullet_points': '•' in cv_text or '*' in cv_text or '-' in cv_text,
+        'sections': sections
     }
     
     return analysis
@@ -137,7 +257,8 @@ def analyze_cv_structure(cv_text):
 def analyze_cv(file_path, job_role):
     """Main function to analyze CV"""
     # Extract text from CV
-    cv_text = extract_text_from_file(file_path)
+    document = extract_cv_document(file_path)
+    cv_text = document['text']
     
     if cv_text.startswith("Error"):
         return {
@@ -146,17 +267,32 @@ def analyze_cv(file_path, job_role):
             'suggestions': ['Please upload a valid PDF or DOCX file.']
         }
     
-    # Get job-specific keywords
-    job_keywords = get_job_keywords(job_role)
+    # Lowercase and tokenize once for every analyzer
+    normalized = normalize_document(document)
+    
+    # Get job-specific keywords, inferring the role from the CV when the title is unknown
+    keyword_set = get_keyword_set(job_role)
+    inferred_role = None
+    if keyword_set['role'] is None:
+        inferred_role = infer_role(normalized)
+        if inferred_role:
+            keyword_set = get_keyword_set(inferred_role)
     
     # Calculate ATS score
-    score_analysis = calculate_ats_score(cv_text, job_keywords)
+    score_analysis = calculate_ats_score(
+        normalized, keyword_set['keywords'], keyword_set['weights'], keyword_set['synonyms']
+    )
     
     # Analyze CV structure
-    structure_analysis = analyze_cv_structure(cv_text)
+    structure_analysis = analyze_cv_structure(normalized)
     
     # Generate suggestions
     suggestions = generate_suggestions(score_analysis, structure_analysis)
+    if document['skipped_pages']:
+        suggestions.append(
+            f"Only part of your CV could be analyzed ({len(document['skipped_pages'])} of "
+            f"{document['page_count']} pages skipped). Consider a shorter CV."
+        )
     
     return {
         'score': score_analysis['score'],
@@ -164,7 +300,11 @@ def analyze_cv(file_path, job_role):
         'missing_keywords': score_analysis['missing_keywords'],
         'structure_analysis': structure_analysis,
         'suggestions': suggestions,
-        'job_role': job_role
+        'job_role': job_role,
+        'inferred_role': inferred_role,
+        'skipped_pages': document['skipped_pages'],
+        'truncated': document['truncated'],
+        'timed_out': document.get('timed_out', False)
     }
 
 def generate_suggestions(score_analysis, structure_analysis):
@@ -210,6 +350,66 @@ def generate_suggestions(score_analysis, structure_analysis):
     
     return suggestions
 
+def get_keyword_version(job_role):
+    """Version of the keywords an analysis for this job title is scored against"""
+    keyword_set = get_keyword_set(job_role)
+    # Unknown titles are scored against an inferred role, which depends on every role's keywords
+    return keyword_set['version'] if keyword_set['role'] else get_taxonomy()['fingerprint']
+
+def get_analysis_key(file_name, job_role):
+    """Fingerprint of the inputs a stored ATS analysis depends on"""
+    raw = f"{file_name}|{job_role.strip().lower()}|{get_keyword_version(job_role)}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def _is_complete_analysis(analysis):
+    return 'error' not in analysis and not analysis.get('timed_out')
+
+def cached_analyze_cv(file_path, job_role, content_hash=None):
+    """analyze_cv memoized on (content hash, normalized role, keyword version)"""
+    try:
+        content_hash = content_hash or hash_file(file_path)
+    except OSError:
+        return analyze_cv(file_path, job_role)
+    
+    key_parts = (content_hash, normalize_role(job_role), get_keyword_version(job_role))
+    return memoize('analyze_cv', key_parts, lambda: analyze_cv(file_path, job_role), _is_complete_analysis)
+
+def cached_optimize_cv(file_path, job_role, content_hash=None):
+    """optimize_cv memoized on the same inputs as the analysis it is built from"""
+    try:
+        content_hash = content_hash or hash_file(file_path)
+    except OSError:
+        return optimize_cv(file_path, analyze_cv(file_path, job_role))
+    
+    key_parts = (content_hash, normalize_role(job_role), get_keyword_version(job_role))
+    return memoize(
+        'optimize_cv', key_parts,
+        lambda: optimize_cv(file_path, cached_analyze_cv(file_path, job_role, content_hash))
+    )
+
+def ensure_ats_analysis(cv_upload, save=True):
+    """Return the stored ATS analysis, recomputing it only when the file, role or keywords changed
+    
+    With save=False the recomputed fields are only set on cv_upload, for callers that batch their writes.
+    """
+    analysis_key = get_analysis_key(cv_upload.original_cv.name, cv_upload.job_role)
+    if cv_upload.analysis_key == analysis_key and cv_upload.ats_analysis:
+        return cv_upload.ats_analysis
+    
+    file_path = cv_upload.original_cv.path
+    try:
+        cv_upload.content_hash = hash_file(file_path)
+    except OSError:
+        cv_upload.content_hash = ''
+    analysis = cached_analyze_cv(file_path, cv_upload.job_role, cv_upload.content_hash)
+    
+    cv_upload.ats_analysis = analysis
+    cv_upload.analysis_key = analysis_key
+    cv_upload.ats_score = analysis['score']
+    if save:
+        cv_upload.save(update_fields=['content_hash', 'ats_analysis', 'analysis_key', 'ats_score', 'updated_at'])
+    return analysis
+
 def optimize_cv(file_path, analysis_report):
     """Generate optimized CV suggestions"""
     # This is a simplified version - in a real implementation,
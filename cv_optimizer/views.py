@@ -2,14 +2,19 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import CreateView, DetailView, ListView, DeleteView, TemplateView, View
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse, HttpResponse, Http404
 from django.urls import reverse_lazy
 from .models import CVUpload, CreatedCV, CVTemplate
 from .forms import CVUploadForm, CVCreationForm
-from .utils import analyze_cv, optimize_cv, generate_cv_pdf, extract_text_from_file
-from .gemini_service import GeminiCVAnalyzer
-from .job_matcher import JobMatcher
+from .utils import ensure_ats_analysis, cached_optimize_cv, generate_cv_pdf, extract_cv_document, is_extraction_error
+from .tasks import run_analysis_pipeline
+from .batch_scoring import score_cv_uploads
+from .role_inference import infer_roles
 import json
+import os
+import tempfile
 
 class CVUploadView(LoginRequiredMixin, CreateView):
     model = CVUpload
@@ -21,30 +26,11 @@ class CVUploadView(LoginRequiredMixin, CreateView):
         form.instance.user = self.request.user
         response = super().form_valid(form)
         
-        # Perform Gemini AI analysis
-        try:
-            cv_text = extract_text_from_file(self.object.original_cv.path)
-            gemini_analyzer = GeminiCVAnalyzer()
-            analysis = gemini_analyzer.analyze_cv(cv_text, form.instance.job_role)
-            
-            # Save analysis results
-            self.object.gemini_analysis = analysis
-            self.object.ats_score = analysis.get('ats_score', 0)
-            self.object.missing_sections = analysis.get('missing_sections', [])
-            self.object.improvement_suggestions = analysis.get('improvements', [])
-            self.object.keyword_suggestions = analysis.get('keyword_suggestions', [])
-            self.object.job_match_percentage = analysis.get('job_match_percentage', 0)
-            
-            # Generate optimized CV content
-            optimized_content = gemini_analyzer.generate_optimized_cv(cv_text, analysis)
-            self.object.optimized_content = optimized_content
-            
-            self.object.save()
-            
-            messages.success(self.request, 'CV uploaded and analyzed successfully!')
-        except Exception as e:
-            messages.warning(self.request, f'CV uploaded but analysis failed: {str(e)}')
+        # Extraction, scoring and AI analysis run in the background; pages poll cv_status
+        cv_id = self.object.pk
+        transaction.on_commit(lambda: run_analysis_pipeline(cv_id))
         
+        messages.success(self.request, 'CV uploaded! Analysis is running and results will appear shortly.')
         return response
 
 class CVAnalysisView(LoginRequiredMixin, DetailView):
@@ -53,39 +39,27 @@ class CVAnalysisView(LoginRequiredMixin, DetailView):
     context_object_name = 'cv_upload'
     
     def get_object(self):
-        job_role_slug = self.kwargs.get('job_role')
-        unique_id = int(self.kwargs.get('cv_id'))
-        
-        # Convert slug back to job role
-        job_role = job_role_slug.replace('-', ' ').title()
-        
-        # Get user's CVs for this job role ordered by creation date
-        user_cvs = CVUpload.objects.filter(
-            user=self.request.user,
-            job_role__icontains=job_role_slug.replace('-', ' ')
-        ).order_by('created_at')
-        
-        # Get the CV at the specified index
+        # Single lookup on the (user, role_slug, role_sequence) unique index
         try:
-            cv = user_cvs[unique_id - 1]
-            if cv:
-                return cv
-        except (IndexError, TypeError):
+            return CVUpload.objects.get(
+                user=self.request.user,
+                role_slug=self.kwargs.get('job_role'),
+                role_sequence=self.kwargs.get('cv_id')
+            )
+        except CVUpload.DoesNotExist:
             pass
         
         # Fallback: return any CV from user
-        return CVUpload.objects.filter(user=self.request.user).first()
+        cv = CVUpload.objects.filter(user=self.request.user).first()
+        if cv is None:
+            raise Http404('CV not found')
+        return cv
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        cv_upload = self.get_object()
         
-        # Perform analysis
-        analysis = analyze_cv(cv_upload.original_cv.path, cv_upload.job_role)
-        cv_upload.ats_score = analysis['score']
-        cv_upload.save()
-        
-        context['analysis'] = analysis
+        # Stored analysis; only recomputed when the file, role or keyword set changed
+        context['analysis'] = ensure_ats_analysis(self.object)
         return context
 
 class CVOptimizeView(LoginRequiredMixin, DetailView):
@@ -102,13 +76,64 @@ class CVOptimizeView(LoginRequiredMixin, DetailView):
         
         if not cv_upload.optimized_cv:
             # Generate optimization tips
-            analysis = analyze_cv(cv_upload.original_cv.path, cv_upload.job_role)
-            optimization_tips = optimize_cv(cv_upload.original_cv.path, analysis)
+            optimization_tips = cached_optimize_cv(cv_upload.original_cv.path, cv_upload.job_role, cv_upload.content_hash)
             messages.info(request, 'Optimization tips generated based on current analysis.')
         
         messages.success(request, 'CV optimization tips generated successfully!')
         return redirect('cv_optimizer:analyze', job_role=cv_upload.get_job_role_slug(), cv_id=cv_upload.get_unique_id())
 
+class CVStatusView(LoginRequiredMixin, View):
+    def get(self, request, cv_id):
+        cv_status = CVUpload.objects.filter(id=cv_id, user=request.user).values(
+            'status', 'status_message', 'ats_score', 'job_match_percentage'
+        ).first()
+        if cv_status is None:
+            return JsonResponse({'error': 'CV not found'}, status=404)
+        
+        cv_status['id'] = cv_id
+        cv_status['is_processing'] = cv_status['status'] not in (CVUpload.STATUS_COMPLETED, CVUpload.STATUS_FAILED)
+        return JsonResponse(cv_status)
+
+class InferRoleView(LoginRequiredMixin, View):
+    """Suggest target roles for a CV file before it is uploaded, so the form can pre-select one"""
+    def post(self, request):
+        cv_file = request.FILES.get('original_cv')
+        if cv_file is None:
+            return JsonResponse({'error': 'No CV file provided'}, status=400)
+        
+        # Extraction works on paths; the content-hash cache lets the real upload reuse this text
+        suffix = os.path.splitext(cv_file.name)[1].lower()
+        with tempfile.NamedTemporaryFile(suffix=suffix) as temp_file:
+            for chunk in cv_file.chunks():
+                temp_file.write(chunk)
+            temp_file.flush()
+            document = extract_cv_document(temp_file.name)
+        
+        if is_extraction_error(document['text']):
+            return JsonResponse({'error': document['text']}, status=400)
+        return JsonResponse({'roles': infer_roles(document['text'], limit=5)})
+
+class BatchScoreView(LoginRequiredMixin, View):
+    """Score CVs against roles: ?cv_id=1&cv_id=2 and/or ?role=Data Scientist (defaults: own CVs, all roles)"""
+    def get(self, request):
+        # Staff rank any uploaded CVs against an opening; users only see their own
+        queryset = CVUpload.objects.all() if request.user.is_staff else CVUpload.objects.filter(user=request.user)
+        cv_ids = [cv_id for cv_id in request.GET.getlist('cv_id') if cv_id.isdigit()]
+        if cv_ids:
+            queryset = queryset.filter(id__in=cv_ids)
+        else:
+            queryset = queryset.filter(user=request.user)
+        
+        max_documents = getattr(settings, 'CV_BATCH_MAX_DOCUMENTS', 100)
+        cv_uploads = list(queryset.order_by('-created_at')[:max_documents + 1])
+        if not cv_uploads:
+            return JsonResponse({'error': 'No CVs found'}, status=404)
+        if len(cv_uploads) > max_documents:
+            return JsonResponse({'error': f'At most {max_documents} CVs can be scored at once'}, status=400)
+        
+        job_roles = [role.strip() for role in request.GET.getlist('role') if role.strip()]
+        return JsonResponse(score_cv_uploads(cv_uploads, job_roles))
+
 class DownloadOptimizedCV(LoginRequiredMixin, DetailView):
     model = CVUpload
     pk_url_kwarg = 'cv_id'